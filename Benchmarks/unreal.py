@@ -0,0 +1,590 @@
+"""
+unreal 模块替身，仅供 Benchmarks 目录下的基准测试使用
+
+在编辑器外模拟关卡中的Actor、组件和材质槽，覆盖场景材质替换工具及场景材质索引工具用到的API。
+每次引擎API调用都会记录次数，并按 CALL_COSTS 中的估算单次耗时累加模拟引擎耗时，
+用于比较改动前后的调用量，而不是还原编辑器中的真实耗时。
+只模拟编辑器中真实存在的API，访问未模拟的成员会抛出 AttributeError 并记录在 UNMODELED 中，
+工具用 try/except 吞掉异常时基准测试仍能发现调用了不存在的API。
+"""
+
+import collections
+import os
+import tempfile
+
+# API名称 -> 调用次数
+CALLS = collections.Counter()
+
+# 访问过的未模拟成员 "类名.成员名" -> 次数，build_scene 时清空
+UNMODELED = collections.Counter()
+
+# API名称 -> 估算的单次编辑器耗时（微秒），未列出的API按 DEFAULT_CALL_COST 计
+# 数值是编辑器内的粗略量级，只用于在同一模型下比较不同实现
+DEFAULT_CALL_COST = 1.0
+CALL_COSTS = {
+    "get_all_level_actors": 50.0,
+    "get_components_by_class": 8.0,
+    "get_num_materials": 1.0,
+    "get_material": 2.0,
+    "set_material": 40.0,
+    "get_editor_property": 3.0,
+    "set_editor_property": 40.0,
+    "get_material_slot_names": 5.0,
+    "modify": 15.0,
+    "find_object": 5.0,
+    "load_asset": 500.0,
+    "transaction": 200.0,
+    "save_package": 3000.0,
+    "save_current_level": 20000.0,
+    "collect_garbage": 50000.0,
+    "load_actor": 800.0,
+}
+
+# 模拟项目目录，基准测试可在运行前修改
+PROJECT_DIR = os.path.join(tempfile.gettempdir(), "ue_benchmark_project")
+
+# 路径 -> 对象，find_object / load_asset 使用
+_OBJECTS = {}
+_ACTORS = []
+_SELECTED = []
+_WORLD = None
+_WORLD_PACKAGE_NAME = ""
+# 为 True 时保存的包会写出文件，由 build_scene(write_packages=True) 开启
+_WRITE_PACKAGE_FILES = False
+
+def record_call(name, count=1):
+    """记录一次（或 count 次）引擎API调用"""
+    CALLS[name] += count
+
+def reset_calls():
+    """清空调用统计"""
+    CALLS.clear()
+
+def write_package_file(package):
+    """在模拟项目 Content 目录写出包文件，供按文件修改时间判断变化的工具使用"""
+    package_name = package._path
+    if not _WRITE_PACKAGE_FILES or not package_name.startswith("/Game/"):
+        return
+    extension = ".umap" if package_name == _WORLD_PACKAGE_NAME else ".uasset"
+    file_path = os.path.join(PROJECT_DIR, "Content", package_name[len("/Game/"):] + extension)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, "w"):
+        pass
+
+def unmodeled_member(owner_name, member_name):
+    """访问未模拟的成员：记录后抛出 AttributeError（下划线开头的内部属性只抛出不记录）"""
+    if not member_name.startswith("_"):
+        UNMODELED[f"{owner_name}.{member_name}"] += 1
+    raise AttributeError(f"unreal 替身没有模拟 {owner_name}.{member_name}")
+
+def __getattr__(name):
+    return unmodeled_member("unreal", name)
+
+def simulated_engine_time():
+    """按调用次数和估算单次耗时计算模拟引擎耗时（秒）"""
+    return sum(count * CALL_COSTS.get(name, DEFAULT_CALL_COST) for name, count in CALLS.items()) / 1000000.0
+
+# ---------------------------------------------------------------------------
+# 对象
+# ---------------------------------------------------------------------------
+
+class StandInType(type):
+    def __getattr__(cls, name):
+        return unmodeled_member(cls.__name__, name)
+
+class StandIn(metaclass=StandInType):
+    """所有替身类的基类，实例和类上访问未模拟的成员都会抛出 AttributeError"""
+
+    def __getattr__(self, name):
+        return unmodeled_member(type(self).__name__, name)
+
+class Object(StandIn):
+    """UObject 替身：名称、外部对象和可读写的编辑器属性"""
+
+    def __init__(self, name, outer=None):
+        self._name = name
+        self._outer = outer
+        self._props = {}
+        if outer is None:
+            self._path = name
+        elif isinstance(outer._outer, Package):
+            # 资产的子对象使用 ":" 分隔，例如 /Game/Map.Map:PersistentLevel
+            self._path = f"{outer._path}:{name}"
+        else:
+            self._path = f"{outer._path}.{name}"
+        _OBJECTS[self._path] = self
+
+    def get_name(self):
+        record_call("get_name")
+        return self._name
+
+    def get_fname(self):
+        record_call("get_fname")
+        return self._name
+
+    def get_path_name(self):
+        record_call("get_path_name")
+        return self._path
+
+    def get_class(self):
+        return type(self)
+
+    def get_outer(self):
+        return self._outer
+
+    def get_outermost(self):
+        record_call("get_outermost")
+        obj = self
+        while obj._outer:
+            obj = obj._outer
+        return obj
+
+    def get_package(self):
+        record_call("get_package")
+        return self.get_outermost()
+
+    def modify(self, always_mark_dirty=True):
+        record_call("modify")
+        return True
+
+    def get_editor_property(self, name):
+        record_call("get_editor_property")
+        if name not in self._props:
+            raise Exception(f"{type(self).__name__} 没有属性 {name}")
+        value = self._props[name]
+        return list(value) if isinstance(value, list) else value
+
+    def set_editor_property(self, name, value, notify_mode=None):
+        record_call("set_editor_property")
+        self._props[name] = list(value) if isinstance(value, list) else value
+        self._mark_dirty()
+
+    def _mark_dirty(self):
+        package = self._package_for_save()
+        if package:
+            package.dirty = True
+
+    def _package_for_save(self):
+        obj = self
+        while obj:
+            if isinstance(obj, Package):
+                return obj
+            if getattr(obj, "_external_package", None):
+                return obj._external_package
+            obj = obj._outer
+        return None
+
+class Package(Object):
+    def __init__(self, name):
+        super().__init__(name)
+        self.dirty = False
+
+
+class MaterialInterface(Object):
+    pass
+
+class Material(MaterialInterface):
+    pass
+
+class MaterialInstanceConstant(MaterialInterface):
+    pass
+
+class StaticMesh(Object):
+    pass
+
+class SkeletalMesh(Object):
+    pass
+
+class World(Object):
+    pass
+
+class Level(Object):
+    pass
+
+class Vector(StandIn):
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.x, self.y, self.z = x, y, z
+
+class SoftObjectPath(StandIn):
+    """软对象路径结构体：与编辑器一致，str() 得到的是结构体描述而不是路径"""
+
+    def __init__(self, path):
+        self._path = path
+
+    def export_text(self):
+        return self._path
+
+    def __repr__(self):
+        package_name, _, sub_path = self._path.partition(":")
+        return f"<Struct 'SoftObjectPath' {{asset_path: {package_name}, sub_path_string: \"{sub_path}\"}}>"
+
+class Box(StandIn):
+    def __init__(self, min=None, max=None):
+        self.min = min or Vector()
+        self.max = max or Vector()
+
+# ---------------------------------------------------------------------------
+# Actor 和组件
+# ---------------------------------------------------------------------------
+
+class ActorComponent(Object):
+    def get_owner(self):
+        record_call("get_owner")
+        return self._outer
+
+class MeshComponent(ActorComponent):
+    """网格体组件：材质槽保存在 override_materials 中"""
+
+    def __init__(self, name, owner, materials, slot_names=None):
+        super().__init__(name, owner)
+        self._props["override_materials"] = list(materials)
+        self._slot_names = slot_names or [f"Slot{i}" for i in range(len(materials))]
+
+    def get_num_materials(self):
+        record_call("get_num_materials")
+        return len(self._props["override_materials"])
+
+    def get_material(self, element_index):
+        record_call("get_material")
+        materials = self._props["override_materials"]
+        return materials[element_index] if 0 <= element_index < len(materials) else None
+
+    def set_material(self, element_index, material):
+        record_call("set_material")
+        materials = self._props["override_materials"]
+        if 0 <= element_index < len(materials):
+            materials[element_index] = material
+            self._mark_dirty()
+
+    def get_material_slot_names(self):
+        record_call("get_material_slot_names")
+        return list(self._slot_names)
+
+class StaticMeshComponent(MeshComponent):
+    def __init__(self, name, owner, materials, mesh=None, slot_names=None):
+        super().__init__(name, owner, materials, slot_names)
+        self._props["static_mesh"] = mesh
+
+class InstancedStaticMeshComponent(StaticMeshComponent):
+    pass
+
+class HierarchicalInstancedStaticMeshComponent(InstancedStaticMeshComponent):
+    pass
+
+class SkinnedMeshComponent(MeshComponent):
+    def __init__(self, name, owner, materials, mesh=None, slot_names=None):
+        super().__init__(name, owner, materials, slot_names)
+        self._props["skinned_asset"] = mesh
+
+class SkeletalMeshComponent(SkinnedMeshComponent):
+    pass
+
+class Actor(Object):
+    """Actor 替身，external_package 不为空时模拟 One File Per Actor 的外部包"""
+
+    def __init__(self, name, level, location, extent, external_package=None):
+        self._external_package = external_package
+        super().__init__(name, level)
+        self.components = []
+        self._location = location
+        self._extent = extent
+        self.guid = len(_ACTORS) + 1
+
+    def get_package(self):
+        record_call("get_package")
+        return self._external_package or self.get_outermost()
+
+    def get_components_by_class(self, component_class):
+        record_call("get_components_by_class")
+        return [component for component in self.components if isinstance(component, component_class)]
+
+    def get_actor_label(self):
+        return self._name
+
+    def get_actor_location(self):
+        return self._location
+
+    def get_actor_bounds(self, only_colliding_components, include_from_child_actors=False):
+        record_call("get_actor_bounds")
+        return self._location, self._extent
+
+# ---------------------------------------------------------------------------
+# 编辑器API
+# ---------------------------------------------------------------------------
+
+def find_object(outer, name):
+    record_call("find_object")
+    obj = _OBJECTS.get(str(name))
+    if isinstance(obj, Actor) and not WorldPartitionBlueprintLibrary.is_loaded(obj):
+        return None
+    return obj
+
+class EditorAssetLibrary(StandIn):
+    @staticmethod
+    def load_asset(asset_path):
+        record_call("load_asset")
+        obj = _OBJECTS.get(asset_path)
+        if obj is None and "." not in asset_path.rsplit("/", 1)[-1]:
+            asset_name = asset_path.rsplit("/", 1)[-1]
+            obj = _OBJECTS.get(f"{asset_path}.{asset_name}")
+        return obj
+
+    @staticmethod
+    def does_asset_exist(asset_path):
+        record_call("does_asset_exist")
+        return EditorAssetLibrary.load_asset(asset_path) is not None
+
+class EditorLevelLibrary(StandIn):
+    @staticmethod
+    def get_all_level_actors():
+        record_call("get_all_level_actors")
+        return [actor for actor in _ACTORS if WorldPartitionBlueprintLibrary.is_loaded(actor)]
+
+    @staticmethod
+    def get_selected_level_actors():
+        record_call("get_selected_level_actors")
+        return list(_SELECTED)
+
+    @staticmethod
+    def get_editor_world():
+        return _WORLD
+
+    @staticmethod
+    def save_current_level():
+        # 保存关卡包以及所有脏的外部Actor包
+        dirty = [actor._external_package for actor in _ACTORS
+                 if actor._external_package and actor._external_package.dirty]
+        record_call("save_current_level")
+        record_call("save_package", len(dirty))
+        for package in dirty:
+            package.dirty = False
+            write_package_file(package)
+        return True
+
+class EditorActorSubsystem(StandIn):
+    def get_all_level_actors(self):
+        return EditorLevelLibrary.get_all_level_actors()
+
+    def get_selected_level_actors(self):
+        return EditorLevelLibrary.get_selected_level_actors()
+
+class LevelEditorSubsystem(StandIn):
+    def save_current_level(self):
+        return EditorLevelLibrary.save_current_level()
+
+class UnrealEditorSubsystem(StandIn):
+    def get_editor_world(self):
+        return _WORLD
+
+def get_editor_subsystem(subsystem_class):
+    return subsystem_class()
+
+class EditorLoadingAndSavingUtils(StandIn):
+    @staticmethod
+    def get_dirty_content_packages():
+        record_call("get_dirty_content_packages")
+        return [obj for obj in _OBJECTS.values()
+                if isinstance(obj, Package) and obj.dirty and obj._path != _WORLD_PACKAGE_NAME]
+
+    @staticmethod
+    def get_dirty_map_packages():
+        record_call("get_dirty_map_packages")
+        package = _OBJECTS.get(_WORLD_PACKAGE_NAME)
+        return [package] if package and package.dirty else []
+
+    @staticmethod
+    def save_packages(packages, only_dirty):
+        record_call("save_packages")
+        saved = [package for package in packages if package.dirty or not only_dirty]
+        record_call("save_package", len(saved))
+        for package in saved:
+            package.dirty = False
+            write_package_file(package)
+        return True
+
+class ScopedEditorTransaction(StandIn):
+    def __init__(self, description):
+        record_call("transaction")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+class ScopedSlowTask(StandIn):
+    """进度对话框替身，cancel_after 不为空时在完成指定工作量后模拟用户取消"""
+    cancel_after = None
+
+    def __init__(self, amount_of_work, default_message="", enabled=True):
+        self.completed_work = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def make_dialog(self, can_cancel=False, allow_in_pie=False):
+        pass
+
+    def enter_progress_frame(self, work=1.0, desc=""):
+        self.completed_work += work
+
+    def should_cancel(self):
+        return ScopedSlowTask.cancel_after is not None and self.completed_work >= ScopedSlowTask.cancel_after
+
+class SystemLibrary(StandIn):
+    @staticmethod
+    def is_valid(obj):
+        return obj is not None
+
+    @staticmethod
+    def conv_soft_obj_path_to_string(soft_object_path):
+        return soft_object_path._path
+
+    @staticmethod
+    def collect_garbage():
+        record_call("collect_garbage")
+
+class Paths(StandIn):
+    @staticmethod
+    def project_dir():
+        return PROJECT_DIR + "/"
+
+    @staticmethod
+    def project_saved_dir():
+        return os.path.join(PROJECT_DIR, "Saved") + "/"
+
+    @staticmethod
+    def project_content_dir():
+        return os.path.join(PROJECT_DIR, "Content") + "/"
+
+class WorldPartitionActorDescInfo(StandIn):
+    def __init__(self, actor):
+        self.guid = actor.guid
+        self.name = actor._name
+        self.actor_path = SoftObjectPath(actor._path)
+        self.package_name = actor._external_package._path if actor._external_package else ""
+        location, extent = actor._location, actor._extent
+        self.bounds = Box(
+            Vector(location.x - extent.x, location.y - extent.y, location.z - extent.z),
+            Vector(location.x + extent.x, location.y + extent.y, location.z + extent.z),
+        )
+        self.is_spatially_loaded = True
+
+class WorldPartitionBlueprintLibrary(StandIn):
+    """World Partition 替身，build_scene(world_partition=True) 时Actor默认不加载"""
+    enabled = False
+    loaded_guids = set()
+    peak_loaded = 0
+
+    @classmethod
+    def is_loaded(cls, actor):
+        return not cls.enabled or actor.guid in cls.loaded_guids
+
+    @classmethod
+    def get_actor_descs(cls):
+        record_call("get_actor_descs")
+        return [WorldPartitionActorDescInfo(actor) for actor in _ACTORS] if cls.enabled else []
+
+    @classmethod
+    def load_actors(cls, actor_guids):
+        record_call("load_actors")
+        record_call("load_actor", len(actor_guids))
+        cls.loaded_guids.update(actor_guids)
+        cls.peak_loaded = max(cls.peak_loaded, len(cls.loaded_guids))
+
+    @classmethod
+    def unload_actors(cls, actor_guids):
+        record_call("unload_actors")
+        cls.loaded_guids.difference_update(actor_guids)
+
+def log(message):
+    print(message)
+
+def log_warning(message):
+    print(f"Warning: {message}")
+
+def log_error(message):
+    print(f"Error: {message}")
+
+# ---------------------------------------------------------------------------
+# 场景构建
+# ---------------------------------------------------------------------------
+
+SOURCE_MATERIAL = "/Game/Benchmark/Materials/M_Source.M_Source"
+OTHER_MATERIAL = "/Game/Benchmark/Materials/M_Other.M_Other"
+TARGET_MATERIAL = "/Game/Benchmark/Materials/M_Target.M_Target"
+
+def create_asset(asset_class, asset_path):
+    """创建 /Game/... 资产对象，返回资产"""
+    package_name = asset_path.split(".")[0]
+    asset_name = package_name.rsplit("/", 1)[-1]
+    return asset_class(asset_name, Package(package_name))
+
+def build_scene(actor_count, slots_per_component=3, components_per_actor=1, mesh_count=300,
+                source_ratio=1.0, external_actors=True, world_partition=False, write_packages=False, spacing=500.0):
+    """
+    构建模拟关卡：actor_count 个Actor排成正方形网格，组件类型轮流使用
+    静态网格体 / 实例化静态网格体 / 骨骼网格体 / 其他网格体组件
+    约 source_ratio 比例的Actor使用 SOURCE_MATERIAL，其余使用 OTHER_MATERIAL
+    mesh_count 个网格体资产由组件轮流共用，write_packages 为 True 时把关卡和外部Actor包写到模拟项目目录
+    """
+    global _WORLD, _WORLD_PACKAGE_NAME, _WRITE_PACKAGE_FILES
+    _OBJECTS.clear()
+    _ACTORS.clear()
+    UNMODELED.clear()
+    _SELECTED.clear()
+    WorldPartitionBlueprintLibrary.enabled = world_partition
+    WorldPartitionBlueprintLibrary.loaded_guids = set()
+    WorldPartitionBlueprintLibrary.peak_loaded = 0
+    ScopedSlowTask.cancel_after = None
+
+    source = create_asset(Material, SOURCE_MATERIAL)
+    other = create_asset(Material, OTHER_MATERIAL)
+    create_asset(Material, TARGET_MATERIAL)
+    static_meshes = [create_asset(StaticMesh, f"/Game/Benchmark/Meshes/SM_{i}.SM_{i}") for i in range(mesh_count)]
+    skeletal_meshes = [create_asset(SkeletalMesh, f"/Game/Benchmark/Meshes/SK_{i}.SK_{i}") for i in range(mesh_count)]
+
+    level_package = Package("/Game/Benchmark/Maps/BenchmarkLevel")
+    _WORLD_PACKAGE_NAME = level_package._path
+    _WRITE_PACKAGE_FILES = write_packages
+    _WORLD = World("BenchmarkLevel", level_package)
+    level = Level("PersistentLevel", _WORLD)
+
+    side = max(1, int(actor_count ** 0.5))
+    slot_names = [f"Slot{i}" for i in range(slots_per_component)]
+    for i in range(actor_count):
+        external_package = Package(f"/Game/__ExternalActors__/Benchmark/Maps/BenchmarkLevel/A{i}") if external_actors else None
+        location = Vector((i % side) * spacing, (i // side) * spacing, 0.0)
+        actor = Actor(f"Actor_{i}", level, location, Vector(50.0, 50.0, 50.0), external_package)
+        _ACTORS.append(actor)
+
+        uses_source = int((i + 1) * source_ratio) > int(i * source_ratio)
+        for c in range(components_per_actor):
+            kind = (i + c) % 4
+            materials = [source if uses_source else other] * slots_per_component
+            name = f"Component_{c}"
+            if kind == 0:
+                component = StaticMeshComponent(name, actor, materials, static_meshes[i % mesh_count], slot_names)
+            elif kind == 1:
+                component = HierarchicalInstancedStaticMeshComponent(name, actor, materials, static_meshes[i % mesh_count], slot_names)
+            elif kind == 2:
+                component = SkeletalMeshComponent(name, actor, materials, skeletal_meshes[i % mesh_count], slot_names)
+            else:
+                component = MeshComponent(name, actor, materials, slot_names)
+            actor.components.append(component)
+
+    if write_packages:
+        write_package_file(level_package)
+        for actor in _ACTORS:
+            if actor._external_package:
+                write_package_file(actor._external_package)
+
+    reset_calls()
+    return _ACTORS
+
+def select_actors(actors):
+    """设置世界大纲中选中的Actor"""
+    _SELECTED[:] = actors
@@ -0,0 +1,212 @@
+"""
+场景材质替换工具基准测试
+
+在编辑器外使用同目录下的 unreal 模块替身运行 Scripts/场景材质替换工具.py，
+按不同Actor数量和参数组合测量墙钟时间、模拟引擎耗时、每个组件的引擎调用数、输出行数和峰值内存。
+
+用法:
+    python Benchmarks/场景材质替换基准测试.py
+    python Benchmarks/场景材质替换基准测试.py --sizes 1000,10000 --scenarios 默认,逐槽写入 --details
+    python Benchmarks/场景材质替换基准测试.py --sizes 100000 --no-memory --json result.json
+"""
+
+import argparse
+import contextlib
+import gc
+import importlib.util
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import unicodedata
+
+# 脚本所在目录在 sys.path 首位，import unreal 得到的是替身模块
+import unreal
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Scripts")
+TOOL_PATH = os.path.join(SCRIPTS_DIR, "场景材质替换工具.py")
+INDEX_MODULE_NAME = "场景材质索引工具"
+
+DEFAULT_SIZES = "1000,10000,100000"
+
+# 名称, 工具参数, build_scene 参数, 测量前的准备步骤（run=先完整运行一次，index=先建立材质索引）
+SCENARIOS = [
+    ("默认", {}, {}, None),
+    ("逐槽写入", {"use_batch_write": False}, {}, None),
+    ("保存整个关卡", {"save_mode": "level"}, {}, None),
+    ("不记录撤销", {"transaction_chunk_size": 0}, {}, None),
+    ("重复运行", {}, {}, "run"),
+    ("映射表遍历(1%命中)", {"remap_table": "{remap}"}, {"source_ratio": 0.01}, None),
+    ("映射表索引(1%命中)", {"remap_table": "{remap}", "use_material_index": True},
+     {"source_ratio": 0.01, "write_packages": True}, "index"),
+    ("分区流式处理", {"stream_world_partition": True}, {"world_partition": True}, None),
+]
+
+class LineCounter:
+    """替换 stdout，统计工具输出的行数，verbose 时同时转发到原输出"""
+
+    def __init__(self, stream, verbose=False):
+        self.stream = stream
+        self.verbose = verbose
+        self.lines = 0
+
+    def write(self, text):
+        self.lines += text.count("\n")
+        if self.verbose:
+            self.stream.write(text)
+        return len(text)
+
+    def flush(self):
+        if self.verbose:
+            self.stream.flush()
+
+def load_tool(params, project_dir):
+    """重新加载替换工具并设置参数，同时丢弃上一次缓存的索引工具模块"""
+    sys.modules.pop(INDEX_MODULE_NAME, None)
+    spec = importlib.util.spec_from_file_location("scene_material_replace_tool", TOOL_PATH)
+    tool = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(tool)
+
+    remap_path = os.path.join(project_dir, "remap.json")
+    with open(remap_path, "w", encoding="utf-8") as f:
+        json.dump({unreal.SOURCE_MATERIAL: unreal.TARGET_MATERIAL}, f)
+
+    tool.target_material = unreal.TARGET_MATERIAL
+    for name, value in params.items():
+        setattr(tool, name, value.replace("{remap}", remap_path) if isinstance(value, str) else value)
+    return tool
+
+def prepare(tool, prepare_step):
+    """执行测量前的准备步骤，输出不计入结果"""
+    with contextlib.redirect_stdout(LineCounter(sys.stdout)):
+        if prepare_step == "run":
+            tool.main()
+        elif prepare_step == "index":
+            tool.import_sibling_module(INDEX_MODULE_NAME).update_material_index()
+
+def run_scenario(scenario, actor_count, args):
+    """构建场景并运行一次工具，返回测量结果"""
+    name, params, scene_options, prepare_step = scenario
+    project_dir = tempfile.mkdtemp(prefix="ue_benchmark_")
+    unreal.PROJECT_DIR = project_dir
+    try:
+        unreal.build_scene(actor_count, slots_per_component=args.slots,
+                           components_per_actor=args.components, **scene_options)
+        tool = load_tool(params, project_dir)
+        prepare(tool, prepare_step)
+
+        unreal.reset_calls()
+        output = LineCounter(sys.stdout, args.verbose)
+        gc.collect()
+        if args.memory:
+            tracemalloc.start()
+
+        start_time = time.perf_counter()
+        with contextlib.redirect_stdout(output):
+            tool.main()
+        wall_time = time.perf_counter() - start_time
+
+        peak_memory = 0
+        if args.memory:
+            peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    finally:
+        shutil.rmtree(project_dir, ignore_errors=True)
+
+    component_count = actor_count * args.components
+    engine_calls = sum(unreal.CALLS.values())
+    return {
+        "scenario": name,
+        "actors": actor_count,
+        "components": component_count,
+        "wall_time": wall_time,
+        "engine_time": unreal.simulated_engine_time(),
+        "engine_calls": engine_calls,
+        "calls_per_component": engine_calls / component_count if component_count else 0.0,
+        "output_lines": output.lines,
+        "peak_memory_mb": peak_memory / (1024 * 1024),
+        "saved_packages": unreal.CALLS.get("save_package", 0),
+        "peak_loaded_actors": unreal.WorldPartitionBlueprintLibrary.peak_loaded,
+        "calls": dict(unreal.CALLS),
+        "unmodeled": dict(unreal.UNMODELED),
+    }
+
+COLUMNS = [
+    ("场景", 20, "scenario", "{}"),
+    ("Actor数", 9, "actors", "{}"),
+    ("墙钟(秒)", 10, "wall_time", "{:.2f}"),
+    ("模拟引擎(秒)", 14, "engine_time", "{:.2f}"),
+    ("调用/组件", 11, "calls_per_component", "{:.1f}"),
+    ("输出行数", 10, "output_lines", "{}"),
+    ("峰值内存MB", 12, "peak_memory_mb", "{:.1f}"),
+    ("保存包数", 10, "saved_packages", "{}"),
+]
+
+def pad(text, width, left=False):
+    """按终端显示宽度补齐（中文字符占两列）"""
+    display_width = sum(2 if unicodedata.east_asian_width(ch) in "WF" else 1 for ch in text)
+    padding = " " * max(width - display_width, 0)
+    return text + padding if left else padding + text
+
+def format_row(values):
+    return "".join(pad(value, width, index == 0) for index, (value, (_, width, _, _)) in enumerate(zip(values, COLUMNS)))
+
+def print_result(result, show_details):
+    """输出一行测量结果"""
+    print(format_row([template.format(result[key]) for _, _, key, template in COLUMNS]))
+    if show_details:
+        for api_name, count in sorted(result["calls"].items(), key=lambda item: -item[1]):
+            cost = unreal.CALL_COSTS.get(api_name, unreal.DEFAULT_CALL_COST)
+            print(f"    {api_name:<28}{count:>10} 次  {count / result['components']:>8.2f} 次/组件"
+                  f"  估算 {count * cost / 1000000.0:>8.2f}秒")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="场景材质替换工具基准测试（使用 unreal 模块替身）")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Actor数量，逗号分隔")
+    parser.add_argument("--scenarios", default="", help="只运行指定场景，逗号分隔，默认全部")
+    parser.add_argument("--slots", type=int, default=3, help="每个组件的材质槽数")
+    parser.add_argument("--components", type=int, default=1, help="每个Actor的网格体组件数")
+    parser.add_argument("--no-memory", dest="memory", action="store_false",
+                        help="不测量峰值内存（tracemalloc 会明显拖慢大规模测试）")
+    parser.add_argument("--details", action="store_true", help="输出每个API的调用次数和估算耗时")
+    parser.add_argument("--verbose", action="store_true", help="同时输出工具自身的日志")
+    parser.add_argument("--json", default="", help="将结果写入JSON文件")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    selected = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    scenarios = [scenario for scenario in SCENARIOS if not selected or scenario[0] in selected]
+    if not scenarios:
+        print(f"❌ 没有匹配的场景，可选: {', '.join(scenario[0] for scenario in SCENARIOS)}")
+        return 1
+
+    print("=== 📈 场景材质替换工具基准测试 ===")
+    print(f"每个组件 {args.slots} 个材质槽，每个Actor {args.components} 个组件；模拟引擎耗时按 unreal.CALL_COSTS 估算")
+    print(format_row([title for title, _, _, _ in COLUMNS]))
+
+    results = []
+    for actor_count in sizes:
+        for scenario in scenarios:
+            result = run_scenario(scenario, actor_count, args)
+            results.append(result)
+            print_result(result, args.details)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"💾 结果已写入: {args.json}")
+
+    # 工具可能用 try/except 吞掉了 AttributeError，结果看起来正常但在编辑器中会失败
+    failed = [result for result in results if result["unmodeled"]]
+    for result in failed:
+        members = ", ".join(f"{name} ({count} 次)" for name, count in sorted(result["unmodeled"].items()))
+        print(f"❌ {result['scenario']} ({result['actors']} 个Actor) 访问了替身未模拟的API: {members}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,10 +2,10 @@
 @PLUGIN_INFO
 id: 9M1pP4sS
 name: 场景材质替换工具
-description: 批量替换场景内所有可替换材质的物体为指定材质，支持多种材质类型和过滤选项。⚠️ 重要：此操作无法撤回，请确保已保存场景！
+description: 批量替换场景内所有可替换材质的物体为指定材质，支持多种材质类型和过滤选项。替换按分块事务执行，可随时取消，并可使用 Ctrl+Z 撤销
 category: 材质工具
 favorite: true
-usage: 选择目标材质，设置替换选项，然后运行脚本即可批量替换场景内所有物体的材质。⚠️ 重要：此操作无法撤回，请确保已保存场景！
+usage: 选择目标材质，设置替换选项，然后运行脚本即可批量替换场景内所有物体的材质。事务分块大小设为0时不记录撤销，此时操作无法撤回。World Partition 大地图可开启分区流式处理，逐个单元加载、替换、保存并卸载Actor
 @END_INFO
 
 @PLUGIN_PARAMS
@@ -15,12 +15,60 @@ replace_skeletal_mesh|bool|true||替换骨骼网格体|是否替换骨骼网格
 replace_instanced_static_mesh|bool|true||替换实例化静态网格体|是否替换实例化静态网格体组件的材质
 replace_mesh_component|bool|true||替换网格体组件|是否替换其他网格体组件的材质
 material_slot_index|int|0|0,10|材质槽索引|指定要替换的材质槽索引，0表示所有槽
+material_slot_name|string|||材质槽名称|按名称指定要替换的材质槽（不区分大小写），设置后忽略材质槽索引，可用于定位第0个槽
 use_world_outliner_filter|bool|false||使用世界大纲过滤器|是否只处理世界大纲中选中的Actor
+region_shape|select|none|none,box,sphere|区域范围|none=不限区域，box/sphere=只处理包围盒与该区域相交的Actor
+region_center|string|0,0,0||区域中心|区域中心的世界坐标，格式 X,Y,Z
+region_extent|string|5000,5000,5000||盒体半尺寸|box区域在各轴上的半尺寸，格式 X,Y,Z
+region_radius|float|5000|0,10000000|球体半径|sphere区域的半径
+grid_cell_size|float|10000|100,1000000|空间网格单元大小|按区域筛选时使用的均匀网格单元边长，网格在同一编辑器会话内复用
+rebuild_spatial_grid|bool|false||重建空间网格|Actor移动或新增后勾选，重新建立缓存的空间网格（切换关卡会自动重建）
+skip_identical|bool|true||跳过相同材质|先读取当前材质，只写入与目标材质不同的材质槽，重复运行时几乎没有开销
+remap_table|file|||材质映射表|CSV(源材质,目标材质) 或 JSON({源材质: 目标材质}) 文件，设置后按表一次遍历完成所有替换，忽略目标材质参数
+transaction_chunk_size|int|500|0,10000|事务分块大小|每个撤销事务包含的组件数，分块可限制撤销内存，0表示不记录撤销
+run_mode|select|replace|replace,plan,apply_plan|运行模式|replace=生成计划并立即执行，plan=只生成计划并导出JSON（不修改场景），apply_plan=执行已导出的计划文件
+plan_file|file|||计划文件|plan模式下导出的JSON路径（留空则写入项目Saved目录），apply_plan模式下读取的计划文件
+use_batch_write|bool|true||批量写入材质数组|每个组件整体写入一次 override_materials，代替逐槽调用 set_material，不支持时自动回退
+use_material_index|bool|false||使用材质索引|映射表模式下读取场景材质索引工具建立的索引（自动增量更新），只处理用到源材质的组件，不再遍历所有Actor
+save_mode|select|touched|touched,level,none|保存方式|touched=只保存本次修改的Actor所在的包（支持One File Per Actor），level=保存整个当前关卡，none=不保存
+stream_world_partition|bool|false||分区流式处理|World Partition 关卡按网格单元逐个加载、替换、保存并卸载Actor，可处理无法整体加载的大地图（不记录撤销）
+stream_cell_size|float|25600|1000,1000000|流式单元大小|分区流式处理时每个单元的边长，单元越小同时加载的Actor越少
 @END_PARAMS
 """
 
 import unreal
 import time
+import os
+import sys
+import importlib
+import math
+import contextlib
+import csv
+import json
+
+# 组件分类表：按从具体到一般的顺序排列，每个组件只归入第一个匹配的类别
+# （InstancedStaticMeshComponent 继承自 StaticMeshComponent，必须排在前面）
+COMPONENT_CATEGORIES = [
+    ("instanced_static_mesh", unreal.InstancedStaticMeshComponent, "实例化静态网格体"),
+    ("static_mesh", unreal.StaticMeshComponent, "静态网格体"),
+    ("skeletal_mesh", unreal.SkeletalMeshComponent, "骨骼网格体"),
+    ("mesh_component", unreal.MeshComponent, "网格体组件"),
+]
+
+# 旧实现按类别分四次调用 get_components_by_class，每个类别会被以下扫描命中
+# 仅用于统计本次运行避免的重复访问次数
+LEGACY_SWEEPS = {
+    "instanced_static_mesh": ("static_mesh", "instanced_static_mesh", "mesh_component"),
+    "static_mesh": ("static_mesh", "mesh_component"),
+    "skeletal_mesh": ("skeletal_mesh", "mesh_component"),
+    "mesh_component": ("mesh_component",),
+}
+
+# 网格体资产路径 -> {小写槽名称: 槽索引}，同一网格体的槽名称只查询一次
+SLOT_NAME_CACHE = {}
+
+# 材质对象 -> 路径，同一材质在本次运行中只调用一次 get_path_name
+MATERIAL_PATH_CACHE = {}
 
 def main():
     """主函数"""
@@ -28,8 +76,11 @@ def main():
     
     # 获取参数值
     global target_material, replace_static_mesh, replace_skeletal_mesh
-    global replace_instanced_static_mesh, replace_mesh_component, material_slot_index
-    global use_world_outliner_filter
+    global replace_instanced_static_mesh, replace_mesh_component, material_slot_index, material_slot_name
+    global use_world_outliner_filter, skip_identical, remap_table, transaction_chunk_size
+    global run_mode, plan_file, use_batch_write, save_mode, use_material_index
+    global stream_world_partition, stream_cell_size
+    global region_shape, region_center, region_extent, region_radius, grid_cell_size, rebuild_spatial_grid
     
     # 参数初始化
     try:
@@ -62,11 +113,96 @@ def main():
     except NameError:
         material_slot_index = 0
     
+    try:
+        material_slot_name
+    except NameError:
+        material_slot_name = ""
+    
     try:
         use_world_outliner_filter
     except NameError:
         use_world_outliner_filter = False
     
+    try:
+        skip_identical
+    except NameError:
+        skip_identical = True
+    
+    try:
+        remap_table
+    except NameError:
+        remap_table = ""
+    
+    try:
+        transaction_chunk_size
+    except NameError:
+        transaction_chunk_size = 500
+    
+    try:
+        run_mode
+    except NameError:
+        run_mode = "replace"
+    
+    try:
+        plan_file
+    except NameError:
+        plan_file = ""
+    
+    try:
+        use_batch_write
+    except NameError:
+        use_batch_write = True
+    
+    try:
+        save_mode
+    except NameError:
+        save_mode = "touched"
+    
+    try:
+        use_material_index
+    except NameError:
+        use_material_index = False
+    
+    try:
+        stream_world_partition
+    except NameError:
+        stream_world_partition = False
+    
+    try:
+        stream_cell_size
+    except NameError:
+        stream_cell_size = 25600.0
+    
+    try:
+        region_shape
+    except NameError:
+        region_shape = "none"
+    
+    try:
+        region_center
+    except NameError:
+        region_center = "0,0,0"
+    
+    try:
+        region_extent
+    except NameError:
+        region_extent = "5000,5000,5000"
+    
+    try:
+        region_radius
+    except NameError:
+        region_radius = 5000.0
+    
+    try:
+        grid_cell_size
+    except NameError:
+        grid_cell_size = 10000.0
+    
+    try:
+        rebuild_spatial_grid
+    except NameError:
+        rebuild_spatial_grid = False
+    
     print("📋 脚本参数:")
     print(f"  - 目标材质: {target_material}")
     print(f"  - 替换静态网格体: {replace_static_mesh}")
@@ -74,207 +210,933 @@ def main():
     print(f"  - 替换实例化静态网格体: {replace_instanced_static_mesh}")
     print(f"  - 替换网格体组件: {replace_mesh_component}")
     print(f"  - 材质槽索引: {material_slot_index}")
+    print(f"  - 材质槽名称: {material_slot_name}")
     print(f"  - 使用世界大纲过滤器: {use_world_outliner_filter}")
+    print(f"  - 区域范围: {region_shape}")
+    if region_shape != "none":
+        print(f"  - 区域中心: {region_center}")
+        print(f"  - 盒体半尺寸: {region_extent}" if region_shape == "box" else f"  - 球体半径: {region_radius}")
+        print(f"  - 空间网格单元大小: {grid_cell_size}")
+    print(f"  - 跳过相同材质: {skip_identical}")
+    print(f"  - 材质映射表: {remap_table}")
+    print(f"  - 事务分块大小: {transaction_chunk_size}")
+    print(f"  - 运行模式: {run_mode}")
+    print(f"  - 计划文件: {plan_file}")
+    print(f"  - 批量写入材质数组: {use_batch_write}")
+    print(f"  - 保存方式: {save_mode}")
+    print(f"  - 使用材质索引: {use_material_index}")
+    print(f"  - 分区流式处理: {stream_world_partition}")
+    if stream_world_partition:
+        print(f"  - 流式单元大小: {stream_cell_size}")
+    
+    if run_mode not in ("replace", "plan", "apply_plan"):
+        print(f"❌ 错误: 未知的运行模式 {run_mode}")
+        return
+    
+    phase_times = {}
+    slot_stats = {
+        "written": 0, "write_calls": 0, "skipped_identical": 0, "unmapped": 0, "stale": 0, "failed": 0,
+        "slot_name_missing": 0, "slot_cache_hits": 0, "slot_cache_misses": 0,
+    }
+    SLOT_NAME_CACHE.clear()
+    MATERIAL_PATH_CACHE.clear()
+    
+    if run_mode == "apply_plan":
+        # 执行已导出的计划：目标材质在执行时按需加载，写入前校验旧材质
+        phase_start = time.time()
+        plan = read_replacement_plan(plan_file)
+        if not plan:
+            return
+        
+        current_level = get_current_level_name()
+        if plan.get("level") and current_level and plan["level"] != current_level:
+            print(f"⚠️  计划生成于关卡 {plan['level']}，当前关卡为 {current_level}")
+        
+        plan_entries = plan["components"]
+        targets_by_path = {}
+        verify_plan = True
+        phase_times["读取计划"] = time.time() - phase_start
+    else:
+        resolved = resolve_target_materials()
+        if not resolved:
+            return
+        target_path, remap_paths, targets_by_path = resolved
+        
+        region = create_region()
+        if region is False:
+            return
+        
+        if stream_world_partition:
+            if run_mode != "replace" or save_mode == "none":
+                print("❌ 错误: 分区流式处理只支持 replace 模式，且卸载Actor前必须保存（保存方式不能为 none）")
+                return
+            if use_world_outliner_filter or use_material_index:
+                print("⚠️  分区流式处理会遍历所有单元，忽略世界大纲过滤器和材质索引")
+            # 撤销记录会持有已卸载Actor的引用，使内存无法回收
+            transaction_chunk_size = 0
+            run_streamed_replacement(target_path, remap_paths, targets_by_path, region, slot_stats, phase_times)
+            return
+        
+        if use_material_index and (remap_paths is None or use_world_outliner_filter):
+            print("⚠️  材质索引只用于映射表模式且不能与世界大纲过滤器同时使用，本次遍历Actor")
+        
+        if use_material_index and remap_paths is not None and not use_world_outliner_filter:
+            # 第一步：从材质索引直接定位用到源材质的组件
+            phase_start = time.time()
+            work_items = collect_indexed_components(remap_paths, region)
+            if work_items is None:
+                return
+            phase_times["收集组件"] = time.time() - phase_start
+            print(f"📊 材质索引命中组件: {len(work_items)} 个")
+        else:
+            # 获取场景中的Actor
+            print("🔍 获取场景Actor列表...")
+            if use_world_outliner_filter:
+                actors = unreal.EditorLevelLibrary.get_selected_level_actors()
+                if region:
+                    actors = filter_actors_in_region(actors, region)
+                print(f"📋 处理世界大纲中选中的 {len(actors)} 个Actor")
+            elif region:
+                actors = get_region_actors(region)
+                print(f"📋 处理区域内的 {len(actors)} 个Actor")
+            else:
+                actors = unreal.EditorLevelLibrary.get_all_level_actors()
+                print(f"📋 处理场景中所有 {len(actors)} 个Actor")
+            
+            if not actors:
+                print("❌ 场景中没有找到Actor")
+                return
+            
+            print(f"✅ 找到 {len(actors)} 个Actor")
+            
+            # 第一步：每个Actor只查询一次组件，按最具体的类分桶
+            phase_start = time.time()
+            work_items, legacy_visits = collect_components(actors)
+            phase_times["收集组件"] = time.time() - phase_start
+            print(f"📊 待检查组件: {len(work_items)} 个，避免重复访问 {legacy_visits - len(work_items)} 次")
+        
+        # 第二步：只读地生成替换计划，不修改场景
+        phase_start = time.time()
+        plan_entries = build_replacement_plan(work_items, target_path, remap_paths, slot_stats)
+        phase_times["生成计划"] = time.time() - phase_start
+        verify_plan = False
+        
+        planned_slots = sum(len(entry["slots"]) for entry in plan_entries)
+        print(f"📋 替换计划: {len(plan_entries)} 个组件，{planned_slots} 个材质槽")
+        print(f"📊 跳过(已是目标材质) {slot_stats['skipped_identical']} 个材质槽")
+        if remap_paths is not None:
+            print(f"📊 映射表: {len(remap_paths)} 条，未命中映射的材质槽 {slot_stats['unmapped']} 个")
+        if material_slot_name:
+            print(f"📊 材质槽名称: 查询网格体 {slot_stats['slot_cache_misses']} 次，缓存命中 {slot_stats['slot_cache_hits']} 次，"
+                  f"没有名为 {material_slot_name} 的槽的组件 {slot_stats['slot_name_missing']} 个")
+        
+        if run_mode == "plan":
+            phase_start = time.time()
+            write_replacement_plan(plan_file, plan_entries)
+            phase_times["导出计划"] = time.time() - phase_start
+            print_phase_times(phase_times)
+            print("🎉 === 替换计划已生成，场景未做任何修改 ===")
+            return
+    
+    # 第三步：分块执行计划，每块一个撤销事务，可随时取消
+    print("🎨 开始批量替换材质...")
+    phase_start = time.time()
+    touched_packages = {}
+    processed_components, category_counts, cancelled = apply_replacement_plan(
+        plan_entries, targets_by_path, slot_stats, verify_plan, touched_packages
+    )
+    apply_time = time.time() - phase_start
+    phase_times["执行替换"] = apply_time
+    
+    print(f"✅ 材质替换完成：{processed_components} 个组件，用时 {apply_time:.2f}秒")
+    for key, _, label in COMPONENT_CATEGORIES:
+        if category_counts.get(key):
+            print(f"  - {label}: {category_counts[key]} 个")
+    print(f"📊 材质槽: 写入 {slot_stats['written']}，跳过(已是目标材质) {slot_stats['skipped_identical']}，失败 {slot_stats['failed']}")
+    print(f"📊 写入调用: {slot_stats['write_calls']} 次 (逐槽写入需要 {slot_stats['written']} 次)")
+    if verify_plan:
+        print(f"📊 计划过期(当前材质与计划不符)的材质槽: {slot_stats['stale']} 个")
+    if apply_time > 0:
+        print(f"📊 平均速度: {processed_components / apply_time:.2f} 个/秒")
+    
+    # 保存更改
+    if cancelled:
+        print_phase_times(phase_times)
+        print("⚠️  用户取消了操作，已完成的事务可使用 Ctrl+Z 撤销，未自动保存")
+        return
+    
+    if slot_stats["written"] == 0:
+        print_phase_times(phase_times)
+        print("✅ 没有材质槽被修改，跳过保存")
+        print("🎉 === 材质替换完成 ===")
+        return
+    
+    if save_mode == "none":
+        print("⚠️  保存方式为 none，请手动保存")
+    else:
+        print("💾 保存更改...")
+        phase_start = time.time()
+        if save_mode == "level":
+            save_current_level()
+        else:
+            save_touched_packages(touched_packages)
+        phase_times["保存"] = time.time() - phase_start
+        print(f"✅ 保存用时 {phase_times['保存']:.2f}秒")
+    
+    print_phase_times(phase_times)
+    print("🎉 === 材质替换完成 ===")
+
+def save_current_level():
+    """保存整个当前关卡"""
+    try:
+        # 使用新的API保存级别
+        level_subsystem = unreal.get_editor_subsystem(unreal.LevelEditorSubsystem)
+        if level_subsystem:
+            level_subsystem.save_current_level()
+            print("✅ 保存完成")
+        else:
+            print("⚠️  无法获取LevelEditorSubsystem，跳过保存")
+    except Exception as e:
+        print(f"⚠️  保存失败: {str(e)}")
+
+def save_touched_packages(touched_packages):
+    """
+    一次性保存本次修改过的包
+    touched_packages: {Actor路径: 包}，OFPA关卡中为各Actor的外部包，否则为关卡包
+    """
+    packages = {}
+    for package in touched_packages.values():
+        if package:
+            packages[package.get_name()] = package
+    
+    if not packages:
+        print("✅ 没有需要保存的包")
+        return 0
+    
+    try:
+        if unreal.EditorLoadingAndSavingUtils.save_packages(list(packages.values()), True):
+            print(f"✅ 保存完成: {len(packages)} 个包 ({len(touched_packages)} 个Actor)")
+        else:
+            print(f"⚠️  部分包保存失败，共 {len(packages)} 个包")
+    except Exception as e:
+        print(f"⚠️  保存失败: {str(e)}")
+    
+    return len(packages)
+
+def print_phase_times(phase_times):
+    """输出各阶段用时"""
+    total_time = sum(phase_times.values())
+    print("📈 阶段用时:")
+    for phase, seconds in phase_times.items():
+        percent = seconds / total_time * 100 if total_time > 0 else 0
+        print(f"  {phase}: {seconds:.2f}秒 ({percent:.1f}%)")
+
+def get_current_level_name():
+    """获取当前编辑关卡的包名，失败时返回空字符串"""
+    try:
+        world = unreal.get_editor_subsystem(unreal.UnrealEditorSubsystem).get_editor_world()
+        return world.get_outermost().get_name()
+    except Exception:
+        return ""
+
+def resolve_target_materials():
+    """
+    根据参数准备目标材质
+    返回 (目标材质路径, 映射表, {目标材质路径: 材质})，失败返回 None
+    映射表模式下目标材质路径为 None，映射表为 {源材质路径: 目标材质路径}
+    """
+    if remap_table:
+        # 映射表模式：一次加载所有目标材质，按源材质路径查表
+        remap_paths, targets_by_path = load_material_remap(remap_table)
+        if not remap_paths:
+            print(f"❌ 错误: 材质映射表为空或无法读取 {remap_table}")
+            return None
+        return None, remap_paths, targets_by_path
     
     # 检查目标材质
     if not target_material:
         print("❌ 错误: 未指定目标材质")
-        return
+        return None
     
     # 加载目标材质
     target_material_obj = unreal.EditorAssetLibrary.load_asset(target_material)
     if not target_material_obj:
         print(f"❌ 错误: 无法加载目标材质 {target_material}")
-        return
+        return None
     
     print(f"✅ 目标材质加载成功: {target_material_obj.get_name()}")
+    target_path = target_material_obj.get_path_name()
+    return target_path, None, {target_path: target_material_obj}
+
+def create_transaction(description):
+    """创建撤销事务，事务分块大小为0时不记录撤销"""
+    if transaction_chunk_size > 0:
+        return unreal.ScopedEditorTransaction(description)
+    return contextlib.nullcontext()
+
+def to_object_path(asset_path):
+    """将包路径补全为对象路径，例如 /Game/M/M_Rock -> /Game/M/M_Rock.M_Rock"""
+    asset_path = asset_path.strip()
+    asset_name = asset_path.rsplit('/', 1)[-1]
+    if '.' not in asset_name:
+        asset_path = asset_path + '.' + asset_name
+    return asset_path
+
+def read_remap_table(table_path):
+    """读取材质映射表，返回 [(源材质路径, 目标材质路径)]，支持 CSV 和 JSON"""
+    pairs = []
     
-    # 获取场景中的Actor
-    print("🔍 获取场景Actor列表...")
-    if use_world_outliner_filter:
-        actors = unreal.EditorLevelLibrary.get_selected_level_actors()
-        print(f"📋 处理世界大纲中选中的 {len(actors)} 个Actor")
+    if table_path.lower().endswith(".json"):
+        with open(table_path, "r", encoding="utf-8-sig") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            pairs = list(data.items())
+        else:
+            pairs = [(item["source"], item["target"]) for item in data]
     else:
-        actors = unreal.EditorLevelLibrary.get_all_level_actors()
-        print(f"📋 处理场景中所有 {len(actors)} 个Actor")
+        with open(table_path, "r", encoding="utf-8-sig", newline="") as f:
+            for row in csv.reader(f):
+                # 跳过空行、注释和表头（非 / 开头）
+                if len(row) < 2 or not row[0].strip().startswith("/"):
+                    continue
+                pairs.append((row[0], row[1]))
     
-    if not actors:
-        print("❌ 场景中没有找到Actor")
-        return
+    return [(to_object_path(source), to_object_path(target)) for source, target in pairs if source and target]
+
+def load_material_remap(table_path):
+    """
+    读取映射表并加载目标材质
+    返回 ({源材质对象路径: 目标材质对象路径}, {目标材质对象路径: 目标材质})
+    每个目标材质只加载一次，多个源材质可以映射到同一个目标
+    """
+    if not os.path.isfile(table_path):
+        print(f"❌ 映射表文件不存在: {table_path}")
+        return {}, {}
     
-    print(f"✅ 找到 {len(actors)} 个Actor")
+    try:
+        pairs = read_remap_table(table_path)
+    except Exception as e:
+        print(f"❌ 读取映射表失败: {str(e)}")
+        return {}, {}
     
-    # 开始批量替换材质
-    print("🎨 开始批量替换材质...")
-    start_time = time.time()
-    processed_components = 0
+    loaded_targets = {}
+    remap_paths = {}
+    targets_by_path = {}
+    for source_path, target_path in pairs:
+        if source_path == target_path:
+            continue
+        
+        if target_path not in loaded_targets:
+            target = unreal.EditorAssetLibrary.load_asset(target_path)
+            loaded_targets[target_path] = target.get_path_name() if target else None
+            if target:
+                targets_by_path[loaded_targets[target_path]] = target
+            else:
+                print(f"⚠️  无法加载目标材质 {target_path}")
+        
+        if loaded_targets[target_path]:
+            remap_paths[source_path] = loaded_targets[target_path]
+    
+    print(f"✅ 映射表加载完成: {len(remap_paths)} 条映射，{len(targets_by_path)} 个目标材质")
+    return remap_paths, targets_by_path
+
+def classify_component(component):
+    """返回组件所属的最具体类别，不是网格体组件时返回 None"""
+    for key, component_class, _ in COMPONENT_CATEGORIES:
+        if isinstance(component, component_class):
+            return key
+    return None
+
+def classify_actor_components(actor):
+    """一次性获取Actor的网格体组件，并按最具体的类归入唯一的类别"""
+    buckets = {key: [] for key, _, _ in COMPONENT_CATEGORIES}
+    
+    for component in actor.get_components_by_class(unreal.MeshComponent):
+        key = classify_component(component)
+        if key:
+            buckets[key].append(component)
+    
+    return buckets
+
+def get_enabled_categories():
+    """各组件类别是否启用替换"""
+    return {
+        "instanced_static_mesh": replace_instanced_static_mesh,
+        "static_mesh": replace_static_mesh,
+        "skeletal_mesh": replace_skeletal_mesh,
+        "mesh_component": replace_mesh_component,
+    }
+
+def collect_components(actors):
+    """
+    收集所有启用类别的组件，返回 ([(actor, 类别, 组件)], 旧实现的访问次数)
+    """
+    enabled = get_enabled_categories()
+    work_items = []
+    legacy_visits = 0
     
-    for i, actor in enumerate(actors):
+    for actor in actors:
         try:
-            # 处理静态网格体组件
-            if replace_static_mesh:
-                static_mesh_components = actor.get_components_by_class(unreal.StaticMeshComponent)
-                for component in static_mesh_components:
-                    if replace_static_mesh_materials(component, target_material_obj, material_slot_index):
-                        processed_components += 1
-            
-            # 处理骨骼网格体组件
-            if replace_skeletal_mesh:
-                skeletal_mesh_components = actor.get_components_by_class(unreal.SkeletalMeshComponent)
-                for component in skeletal_mesh_components:
-                    if replace_skeletal_mesh_materials(component, target_material_obj, material_slot_index):
-                        processed_components += 1
-            
-            # 处理实例化静态网格体组件
-            if replace_instanced_static_mesh:
-                instanced_mesh_components = actor.get_components_by_class(unreal.InstancedStaticMeshComponent)
-                for component in instanced_mesh_components:
-                    if replace_instanced_static_mesh_materials(component, target_material_obj, material_slot_index):
-                        processed_components += 1
-            
-            # 处理其他网格体组件
-            if replace_mesh_component:
-                mesh_components = actor.get_components_by_class(unreal.MeshComponent)
-                for component in mesh_components:
-                    if replace_mesh_component_materials(component, target_material_obj, material_slot_index):
-                        processed_components += 1
+            buckets = classify_actor_components(actor)
             
-            # 显示进度
-            if (i + 1) % 5 == 0 or i == len(actors) - 1:
-                print(f"  进度: {i + 1}/{len(actors)} ({processed_components} 个组件已替换)")
+            for key, _, _ in COMPONENT_CATEGORIES:
+                components = buckets[key]
+                if not components:
+                    continue
+                
+                # 旧实现中该类别组件会被所有命中的扫描重复访问
+                legacy_visits += len(components) * sum(1 for sweep in LEGACY_SWEEPS[key] if enabled[sweep])
+                
+                if enabled[key]:
+                    work_items.extend((actor, key, component) for component in components)
                 
         except Exception as e:
             print(f"⚠️  处理Actor失败: {actor.get_name()} - {str(e)}")
     
-    end_time = time.time()
-    total_time = end_time - start_time
-    
-    print(f"✅ 材质替换完成：{processed_components} 个组件，用时 {total_time:.2f}秒")
-    if total_time > 0:
-        print(f"📊 平均速度: {processed_components / total_time:.2f} 个/秒")
-    
-    # 保存更改
-    print("💾 保存更改...")
+    return work_items, legacy_visits
+
+def get_world_partition_actor_descs():
+    """读取 World Partition 关卡所有Actor的描述（无需加载Actor），失败或不是 World Partition 关卡时返回 None"""
     try:
-        # 使用新的API保存级别
-        level_subsystem = unreal.get_editor_subsystem(unreal.LevelEditorSubsystem)
-        if level_subsystem:
-            level_subsystem.save_current_level()
-            print("✅ 保存完成")
-        else:
-            print("⚠️  无法获取LevelEditorSubsystem，跳过保存")
+        actor_descs = unreal.WorldPartitionBlueprintLibrary.get_actor_descs()
     except Exception as e:
-        print(f"⚠️  保存失败: {str(e)}")
+        print(f"❌ 无法读取 World Partition Actor描述: {str(e)}")
+        return None
     
-    print("🎉 === 材质替换完成 ===")
+    if not actor_descs:
+        print("❌ 当前关卡不是 World Partition 关卡或没有Actor")
+        return None
+    return actor_descs
+
+def group_actor_descs_by_cell(actor_descs, cell_size, region):
+    """
+    按包围盒中心把Actor描述分到XY网格单元，每个Actor只属于一个单元，不会被重复加载
+    返回按单元坐标排序的 [(单元, [Actor描述])]，相邻单元连续处理
+    """
+    index_tool = import_sibling_module("场景材质索引工具") if region else None
+    cells = {}
+    for desc in actor_descs:
+        bounds_min = (desc.bounds.min.x, desc.bounds.min.y, desc.bounds.min.z)
+        bounds_max = (desc.bounds.max.x, desc.bounds.max.y, desc.bounds.max.z)
+        if region and not index_tool.bounds_in_region(bounds_min, bounds_max, region):
+            continue
+        
+        cell = (
+            math.floor((bounds_min[0] + bounds_max[0]) * 0.5 / cell_size),
+            math.floor((bounds_min[1] + bounds_max[1]) * 0.5 / cell_size),
+        )
+        cells.setdefault(cell, []).append(desc)
+    return sorted(cells.items())
 
-def replace_static_mesh_materials(component, target_material, slot_index):
-    """替换静态网格体组件的材质"""
+def get_actor_desc_path(desc):
+    """Actor描述中的 actor_path 是 SoftObjectPath 结构体，转换为对象路径字符串"""
     try:
-        material_count = component.get_num_materials()
-        print(f"🔍 静态网格体材质数量: {material_count}")
+        return unreal.SystemLibrary.conv_soft_obj_path_to_string(desc.actor_path)
+    except Exception:
+        return desc.actor_path.export_text().strip('"')
+
+def find_loaded_actors(actor_descs):
+    """根据Actor描述查找已加载的Actor"""
+    actors = []
+    for desc in actor_descs:
+        actor = unreal.find_object(None, get_actor_desc_path(desc))
+        if actor:
+            actors.append(actor)
+    return actors
+
+def run_streamed_replacement(target_path, remap_paths, targets_by_path, region, slot_stats, phase_times):
+    """
+    World Partition 分区流式替换：逐个单元加载Actor、替换、保存被修改的外部Actor包，然后卸载并回收内存
+    同一时间只加载一个单元的Actor，内存峰值与世界大小无关
+    """
+    phase_start = time.time()
+    actor_descs = get_world_partition_actor_descs()
+    if actor_descs is None:
+        return
+    cells = group_actor_descs_by_cell(actor_descs, stream_cell_size, region)
+    phase_times["读取Actor描述"] = time.time() - phase_start
+    print(f"📋 World Partition: {len(actor_descs)} 个Actor描述，分 {len(cells)} 个单元处理")
+    
+    processed_components = 0
+    category_counts = {}
+    saved_packages = 0
+    max_loaded_actors = 0
+    cancelled = False
+    
+    phase_start = time.time()
+    with unreal.ScopedSlowTask(len(cells), "正在分区流式替换场景材质...") as slow_task:
+        slow_task.make_dialog(True)
         
-        if slot_index == 0:
-            # 替换所有材质槽
-            if material_count > 0:
-                for i in range(material_count):
-                    print(f"🎨 替换材质槽 {i}")
-                    component.set_material(i, target_material)
-                return True
-        else:
-            # 替换指定材质槽
-            if slot_index <= material_count:
-                print(f"🎨 替换材质槽 {slot_index}")
-                component.set_material(slot_index, target_material)
-                return True
-            else:
-                print(f"⚠️  材质槽 {slot_index} 不存在，组件只有 {material_count} 个材质槽")
-                return False
+        for cell_index, (cell, descs) in enumerate(cells):
+            if cancelled or slow_task.should_cancel():
+                cancelled = True
+                break
+            slow_task.enter_progress_frame(1, f"单元 {cell_index + 1}/{len(cells)}: {len(descs)} 个Actor")
+            
+            actor_guids = [desc.guid for desc in descs]
+            unreal.WorldPartitionBlueprintLibrary.load_actors(actor_guids)
+            try:
+                actors = find_loaded_actors(descs)
+                if len(actors) < len(descs):
+                    print(f"⚠️  {len(descs) - len(actors)} 个Actor加载后找不到，未处理")
+                max_loaded_actors = max(max_loaded_actors, len(actors))
+                work_items, _ = collect_components(actors)
+                plan_entries = build_replacement_plan(work_items, target_path, remap_paths, slot_stats)
+                
+                touched_packages = {}
+                if plan_entries:
+                    processed, counts, cancelled = apply_replacement_plan(
+                        plan_entries, targets_by_path, slot_stats, False, touched_packages
+                    )
+                    processed_components += processed
+                    for key, count in counts.items():
+                        category_counts[key] = category_counts.get(key, 0) + count
+                
+                # 卸载前必须保存，否则修改会随Actor一起丢弃（取消时也保存已完成的组件）
+                if touched_packages:
+                    saved_packages += save_touched_packages(touched_packages)
+                
+                print(f"  单元 {cell_index + 1}/{len(cells)} {cell}: {len(actors)} 个Actor，"
+                      f"替换 {len(touched_packages)} 个Actor")
+            finally:
+                # 先释放脚本持有的引用，再卸载并回收内存
+                actors = work_items = plan_entries = touched_packages = None
+                unreal.WorldPartitionBlueprintLibrary.unload_actors(actor_guids)
+                unreal.SystemLibrary.collect_garbage()
+    
+    stream_time = time.time() - phase_start
+    phase_times["流式替换"] = stream_time
+    
+    print(f"✅ 材质替换完成：{processed_components} 个组件，用时 {stream_time:.2f}秒")
+    for key, _, label in COMPONENT_CATEGORIES:
+        if category_counts.get(key):
+            print(f"  - {label}: {category_counts[key]} 个")
+    print(f"📊 材质槽: 写入 {slot_stats['written']}，跳过(已是目标材质) {slot_stats['skipped_identical']}，失败 {slot_stats['failed']}")
+    print(f"📊 已保存 {saved_packages} 个包，单个单元最多同时加载 {max_loaded_actors} 个Actor")
+    print_phase_times(phase_times)
+    
+    if cancelled:
+        print("⚠️  用户取消了操作，已处理的单元均已保存，无法撤销")
+        return
+    print("🎉 === 材质替换完成 ===")
+
+def import_sibling_module(module_name):
+    """导入与本脚本位于同一目录的工具脚本"""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    if script_dir not in sys.path:
+        sys.path.append(script_dir)
+    return importlib.import_module(module_name)
+
+def create_region():
+    """根据区域参数创建区域描述，不限区域时返回 None，参数无效时返回 False"""
+    if region_shape == "none":
+        return None
+    
+    if region_shape not in ("box", "sphere"):
+        print(f"❌ 错误: 未知的区域范围 {region_shape}")
+        return False
+    
+    try:
+        index_tool = import_sibling_module("场景材质索引工具")
+        return index_tool.make_region(
+            region_shape,
+            index_tool.parse_vector(region_center),
+            index_tool.parse_vector(region_extent),
+            float(region_radius),
+        )
+    except Exception as e:
+        print(f"❌ 错误: 区域参数无效 {str(e)}")
+        return False
+
+def get_region_actors(region):
+    """通过空间网格获取包围盒与区域相交的Actor，只检查区域覆盖的网格单元"""
+    index_tool = import_sibling_module("场景材质索引工具")
+    grid = index_tool.get_actor_grid(grid_cell_size, rebuild_spatial_grid)
+    return index_tool.query_actors_in_region(grid, region)
+
+def filter_actors_in_region(actors, region):
+    """逐个检查Actor包围盒是否与区域相交（用于数量较少的选中Actor）"""
+    index_tool = import_sibling_module("场景材质索引工具")
+    return [
+        actor for actor in actors
+        if index_tool.bounds_in_region(*index_tool.get_actor_bounds(actor), region)
+    ]
+
+def collect_indexed_components(remap_paths, region=None):
+    """
+    通过场景材质索引收集用到源材质的组件，返回 [(actor, 类别, 组件)]，失败返回 None
+    只有索引命中的组件会被读取，计划阶段仍会核对组件的当前材质
+    region: 不为空时只保留区域内Actor的组件
+    """
+    try:
+        index_tool = import_sibling_module("场景材质索引工具")
     except Exception as e:
-        print("⚠️  替换静态网格体材质失败: " + str(e))
+        print(f"❌ 无法加载场景材质索引工具: {str(e)}")
+        return None
+    
+    index = index_tool.update_material_index()
+    if not index:
+        return None
+    
+    region_actor_paths = None
+    if region:
+        region_actor_paths = set(actor.get_path_name() for actor in get_region_actors(region))
+    
+    # 同一个组件可能有多个槽命中，只收集一次
+    component_paths = set()
+    for source_path in remap_paths:
+        for actor_path, component_path, _ in index["materials"].get(source_path, []):
+            if region_actor_paths is None or actor_path in region_actor_paths:
+                component_paths.add(component_path)
+    
+    enabled = get_enabled_categories()
+    work_items = []
+    for component_path in component_paths:
+        component = unreal.find_object(None, component_path)
+        if component is None:
+            print(f"⚠️  索引中的组件已不存在: {component_path}")
+            continue
+        
+        key = classify_component(component)
+        if key and enabled[key]:
+            work_items.append((component.get_owner(), key, component))
+    
+    return work_items
+
+def build_replacement_plan(work_items, target_path, remap_paths, stats):
+    """
+    只读地生成替换计划，不修改任何组件
+    每项为 {"actor", "component", "category", "slots": [{"slot", "old_material", "new_material"}]}，
+    另外在 "component_obj" 中保留组件对象供本次运行直接执行（不写入计划文件）
+    """
+    labels = {key: label for key, _, label in COMPONENT_CATEGORIES}
+    plan_entries = []
+    
+    for actor, key, component in work_items:
+        slots = plan_component_slots(component, target_path, remap_paths, stats, labels[key])
+        if not slots:
+            continue
+        
+        plan_entries.append({
+            "actor": actor.get_path_name(),
+            "component": component.get_path_name(),
+            "category": key,
+            "slots": slots,
+            "component_obj": component,
+        })
     
-    return False
+    return plan_entries
 
-def replace_skeletal_mesh_materials(component, target_material, slot_index):
-    """替换骨骼网格体组件的材质"""
+def plan_component_slots(component, target_path, remap_paths, stats, label):
+    """
+    读取组件的材质槽，返回需要写入的 [{"slot", "old_material", "new_material"}]
+    映射表模式下按当前材质查表，未命中的槽保持原样；
+    否则开启 skip_identical 时跳过已经是目标材质的槽
+    当前材质一次读取 override_materials 得到，只有 override 为空的槽才单独调用 get_material
+    """
     try:
         material_count = component.get_num_materials()
-        print(f"🔍 骨骼网格体材质数量: {material_count}")
         
-        if slot_index == 0:
+        if material_slot_name:
+            # 按名称替换指定材质槽
+            slot = find_slot_by_name(component, material_slot_name, stats)
+            if slot is None or slot >= material_count:
+                stats["slot_name_missing"] += 1
+                return []
+            slot_indices = [slot]
+        elif material_slot_index == 0:
             # 替换所有材质槽
-            if material_count > 0:
-                for i in range(material_count):
-                    print(f"🎨 替换材质槽 {i}")
-                    component.set_material(i, target_material)
-                return True
-        else:
+            slot_indices = range(material_count)
+        elif material_slot_index < material_count:
             # 替换指定材质槽
-            if slot_index <= material_count:
-                print(f"🎨 替换材质槽 {slot_index}")
-                component.set_material(slot_index, target_material)
-                return True
+            slot_indices = [material_slot_index]
+        else:
+            print(f"⚠️  材质槽 {material_slot_index} 不存在，{label}只有 {material_count} 个材质槽")
+            return []
+        
+        overrides = read_override_materials(component) or []
+        slots = []
+        for i in slot_indices:
+            # override 为空的槽使用网格体默认材质，需要单独读取
+            current_material = overrides[i] if i < len(overrides) else None
+            if current_material is None:
+                current_material = component.get_material(i)
+            old_path = get_material_path(current_material)
+            
+            if remap_paths is not None:
+                new_path = remap_paths.get(old_path)
+                if new_path is None:
+                    stats["unmapped"] += 1
+                    continue
             else:
-                print(f"⚠️  材质槽 {slot_index} 不存在，组件只有 {material_count} 个材质槽")
-                return False
+                new_path = target_path
+                if skip_identical and old_path == new_path:
+                    stats["skipped_identical"] += 1
+                    continue
+            
+            slots.append({"slot": i, "old_material": old_path, "new_material": new_path})
+        
+        return slots
     except Exception as e:
-        print("⚠️  替换骨骼网格体材质失败: " + str(e))
+        print(f"⚠️  读取{label}材质失败: " + str(e))
+        return []
+
+def get_material_path(material):
+    """返回材质的路径（按材质对象缓存），材质为空时返回空字符串"""
+    if not material:
+        return ""
     
-    return False
+    path = MATERIAL_PATH_CACHE.get(material)
+    if path is None:
+        path = material.get_path_name()
+        MATERIAL_PATH_CACHE[material] = path
+    return path
 
-def replace_instanced_static_mesh_materials(component, target_material, slot_index):
-    """替换实例化静态网格体组件的材质"""
+def get_component_mesh_path(component):
+    """返回组件使用的网格体资产路径，组件没有网格体资产时返回 None"""
+    if isinstance(component, unreal.StaticMeshComponent):
+        property_names = ("static_mesh",)
+    elif isinstance(component, unreal.SkinnedMeshComponent):
+        # UE5.1 起骨骼网格体属性改名为 skinned_asset
+        property_names = ("skinned_asset", "skeletal_mesh")
+    else:
+        return None
+    
+    for property_name in property_names:
+        try:
+            mesh = component.get_editor_property(property_name)
+        except Exception:
+            continue
+        return mesh.get_path_name() if mesh else None
+    return None
+
+def find_slot_by_name(component, slot_name, stats):
+    """
+    按名称查找组件的材质槽索引（不区分大小写），找不到时返回 None
+    槽名称来自网格体资产，按网格体路径缓存，共用网格体的组件不再重复查询
+    """
+    mesh_path = get_component_mesh_path(component)
+    slot_indices = SLOT_NAME_CACHE.get(mesh_path) if mesh_path else None
+    
+    if slot_indices is None:
+        stats["slot_cache_misses"] += 1
+        slot_indices = {}
+        for i, name in enumerate(component.get_material_slot_names()):
+            # 重名的槽取第一个
+            slot_indices.setdefault(str(name).lower(), i)
+        if mesh_path:
+            SLOT_NAME_CACHE[mesh_path] = slot_indices
+    else:
+        stats["slot_cache_hits"] += 1
+    
+    return slot_indices.get(slot_name.lower())
+
+def write_replacement_plan(plan_path, plan_entries):
+    """将替换计划写入JSON文件，未指定路径时写入项目 Saved/MaterialReplacePlans 目录"""
+    if not plan_path:
+        plan_dir = os.path.join(unreal.Paths.project_saved_dir(), "MaterialReplacePlans")
+        plan_path = os.path.join(plan_dir, time.strftime("plan_%Y%m%d_%H%M%S.json"))
+    
+    plan_dir = os.path.dirname(os.path.abspath(plan_path))
+    os.makedirs(plan_dir, exist_ok=True)
+    
+    plan = {
+        "version": 1,
+        "level": get_current_level_name(),
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "components": [
+            {key: value for key, value in entry.items() if key != "component_obj"}
+            for entry in plan_entries
+        ],
+    }
+    
+    with open(plan_path, "w", encoding="utf-8") as f:
+        json.dump(plan, f, ensure_ascii=False, indent=1)
+    
+    print(f"💾 替换计划已导出: {plan_path}")
+    return plan_path
+
+def read_replacement_plan(plan_path):
+    """读取替换计划JSON文件，失败返回 None"""
+    if not plan_path or not os.path.isfile(plan_path):
+        print(f"❌ 错误: 计划文件不存在 {plan_path}")
+        return None
+    
     try:
-        material_count = component.get_num_materials()
-        print(f"🔍 实例化静态网格体材质数量: {material_count}")
-        
-        if slot_index == 0:
-            # 替换所有材质槽
-            if material_count > 0:
-                for i in range(material_count):
-                    print(f"🎨 替换材质槽 {i}")
-                    component.set_material(i, target_material)
-                return True
-        else:
-            # 替换指定材质槽
-            if slot_index <= material_count:
-                print(f"🎨 替换材质槽 {slot_index}")
-                component.set_material(slot_index, target_material)
-                return True
-            else:
-                print(f"⚠️  材质槽 {slot_index} 不存在，组件只有 {material_count} 个材质槽")
-                return False
+        with open(plan_path, "r", encoding="utf-8") as f:
+            plan = json.load(f)
     except Exception as e:
-        print("⚠️  替换实例化静态网格体材质失败: " + str(e))
+        print(f"❌ 读取计划文件失败: {str(e)}")
+        return None
     
-    return False
+    if plan.get("version") != 1 or "components" not in plan:
+        print(f"❌ 错误: 不支持的计划文件格式 {plan_path}")
+        return None
+    
+    planned_slots = sum(len(entry["slots"]) for entry in plan["components"])
+    print(f"✅ 计划加载成功: {len(plan['components'])} 个组件，{planned_slots} 个材质槽 (生成于 {plan.get('created', '未知')})")
+    return plan
+
+def get_target_material(material_path, targets_by_path):
+    """按路径获取目标材质，每个路径只加载一次"""
+    if material_path not in targets_by_path:
+        targets_by_path[material_path] = unreal.EditorAssetLibrary.load_asset(material_path)
+        if not targets_by_path[material_path]:
+            print(f"⚠️  无法加载目标材质 {material_path}")
+    return targets_by_path[material_path]
 
-def replace_mesh_component_materials(component, target_material, slot_index):
-    """替换网格体组件的材质"""
+def apply_replacement_plan(plan_entries, targets_by_path, stats, verify, touched_packages):
+    """
+    分块执行替换计划，每 transaction_chunk_size 个组件一个撤销事务
+    返回 (替换的组件数, {类别: 组件数}, 是否被取消)
+    verify: 计划来自文件时为 True，写入前重新读取当前材质并与计划比对
+    touched_packages: 输出，记录被修改的Actor所在的包
+    """
+    labels = {key: label for key, _, label in COMPONENT_CATEGORIES}
+    category_counts = {key: 0 for key, _, _ in COMPONENT_CATEGORIES}
+    processed_components = 0
+    visited_components = 0
+    cancelled = False
+    
+    total = len(plan_entries)
+    chunk_size = transaction_chunk_size if transaction_chunk_size > 0 else max(total, 1)
+    chunk_count = (total + chunk_size - 1) // chunk_size
+    print(f"📋 待替换组件: {total} 个，分 {chunk_count} 个事务执行")
+    
+    with unreal.ScopedSlowTask(total, "正在替换场景材质...") as slow_task:
+        slow_task.make_dialog(True)
+        
+        for chunk_index, chunk_start in enumerate(range(0, total, chunk_size)):
+            if cancelled:
+                break
+            
+            chunk = plan_entries[chunk_start:chunk_start + chunk_size]
+            with create_transaction(f"场景材质替换 ({chunk_index + 1}/{chunk_count})"):
+                for entry in chunk:
+                    # 只在组件之间响应取消，保证每个组件要么完整替换要么保持原样
+                    if slow_task.should_cancel():
+                        cancelled = True
+                        break
+                    
+                    slow_task.enter_progress_frame(1, f"替换材质: {visited_components + 1}/{total}")
+                    visited_components += 1
+                    
+                    key = entry.get("category", "mesh_component")
+                    if apply_component_slots(entry, targets_by_path, stats, verify, labels.get(key, "组件"), touched_packages):
+                        processed_components += 1
+                        category_counts[key] = category_counts.get(key, 0) + 1
+            
+            print(f"  进度: {visited_components}/{total} ({processed_components} 个组件已替换)")
+    
+    return processed_components, category_counts, cancelled
+
+def apply_component_slots(entry, targets_by_path, stats, verify, label, touched_packages):
+    """
+    按计划写入单个组件的材质槽，返回是否有材质槽被写入
+    开启 use_batch_write 时读取一次 override_materials，改好后整体写回，
+    整个组件只跨一次 Python/C++ 边界、只触发一次渲染状态重建；失败时回退到逐槽 set_material
+    """
+    component = entry.get("component_obj")
+    if component is None:
+        component = unreal.find_object(None, entry["component"])
+        if component is None:
+            stats["failed"] += len(entry["slots"])
+            print(f"⚠️  找不到组件: {entry['component']}")
+            return False
+    
+    overrides = read_override_materials(component) if use_batch_write else None
+    
+    # 先确定需要写入的材质槽
+    pending = []
+    for slot in entry["slots"]:
+        slot_index = slot["slot"]
+        try:
+            target = get_target_material(slot["new_material"], targets_by_path)
+            if not target:
+                stats["failed"] += 1
+                continue
+            
+            if verify:
+                # override 为空的槽使用网格体默认材质，需要单独读取
+                current_material = overrides[slot_index] if overrides and slot_index < len(overrides) else None
+                if current_material is None:
+                    current_material = component.get_material(slot_index)
+                current_path = get_material_path(current_material)
+                if current_path == slot["new_material"]:
+                    stats["skipped_identical"] += 1
+                    continue
+                if current_path != slot["old_material"]:
+                    stats["stale"] += 1
+                    print(f"⚠️  {label}材质槽 {slot_index} 已变化，跳过: {entry['component']}")
+                    continue
+            
+            pending.append((slot_index, target))
+        except Exception as e:
+            stats["failed"] += 1
+            print(f"⚠️  读取{label}材质槽 {slot_index} 失败: " + str(e))
+    
+    if not pending:
+        return False
+    
+    # 写入前登记到当前撤销事务，并记录需要保存的包
+    component.modify()
+    record_touched_package(entry["actor"], component, touched_packages)
+    
+    if overrides is not None and write_override_materials(component, overrides, pending):
+        print(f"🎨 批量写入 {len(pending)} 个材质槽")
+        stats["written"] += len(pending)
+        stats["write_calls"] += 1
+        return True
+    
+    # 逐槽写入（批量写入不可用时的备用方法）
+    written = False
+    for slot_index, target in pending:
+        try:
+            print(f"🎨 替换材质槽 {slot_index}")
+            component.set_material(slot_index, target)
+            stats["written"] += 1
+            stats["write_calls"] += 1
+            written = True
+        except Exception as e:
+            stats["failed"] += 1
+            print(f"⚠️  替换{label}材质槽 {slot_index} 失败: " + str(e))
+    
+    return written
+
+def record_touched_package(actor_path, component, touched_packages):
+    """记录组件所属Actor的包，OFPA关卡中 get_package 返回Actor自己的外部包"""
+    if actor_path in touched_packages:
+        return
+    
     try:
-        material_count = component.get_num_materials()
-        print(f"🔍 网格体组件材质数量: {material_count}")
+        touched_packages[actor_path] = component.get_owner().get_package()
+    except Exception:
+        touched_packages[actor_path] = component.get_outermost()
+
+def read_override_materials(component):
+    """读取组件的 override_materials 数组，不支持时返回 None"""
+    try:
+        return list(component.get_editor_property("override_materials"))
+    except Exception:
+        return None
+
+def write_override_materials(component, overrides, pending):
+    """将待写入的槽合并进 override_materials 后整体写回，失败返回 False"""
+    try:
+        materials = list(overrides)
+        required_length = max(slot_index for slot_index, _ in pending) + 1
+        if len(materials) < required_length:
+            # 未覆盖的槽保持为空，继续使用网格体默认材质
+            materials.extend([None] * (required_length - len(materials)))
         
-        if slot_index == 0:
-            # 替换所有材质槽
-            if material_count > 0:
-                for i in range(material_count):
-                    print(f"🎨 替换材质槽 {i}")
-                    component.set_material(i, target_material)
-                return True
-        else:
-            # 替换指定材质槽
-            if slot_index <= material_count:
-                print(f"🎨 替换材质槽 {slot_index}")
-                component.set_material(slot_index, target_material)
-                return True
-            else:
-                print(f"⚠️  材质槽 {slot_index} 不存在，组件只有 {material_count} 个材质槽")
-                return False
+        for slot_index, target in pending:
+            materials[slot_index] = target
+        
+        component.set_editor_property("override_materials", materials)
+        return True
     except Exception as e:
-        print("⚠️  替换网格体组件材质失败: " + str(e))
-    
-    return False
+        print(f"⚠️  批量写入材质失败，改为逐槽写入: " + str(e))
+        return False
 
 if __name__ == "__main__":
     main()
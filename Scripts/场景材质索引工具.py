@@ -0,0 +1,441 @@
+"""
+@PLUGIN_INFO
+id: 4K7mR2xV
+name: 场景材质索引工具
+description: 为当前关卡建立 材质 -> (Actor, 组件, 材质槽) 的倒排索引并保存到磁盘，按关卡包及其保存时间记录，关卡变化时只增量重扫变化的Actor。另提供按Actor包围盒建立的均匀空间网格，用于按区域筛选Actor。场景材质替换工具可直接读取索引，只处理用到源材质的组件
+category: 材质工具
+favorite: false
+usage: 填写要查询的材质后运行脚本，输出所有使用该材质的Actor、组件和材质槽；不填写时列出被引用最多的材质。首次运行会完整扫描关卡，之后只重扫变化的Actor
+@END_INFO
+
+@PLUGIN_PARAMS
+query_material|file|||查询材质|要查询的材质路径，留空则列出被引用最多的材质
+rebuild_index|bool|false||完全重建索引|忽略已有索引，重新扫描整个关卡
+show_count|int|20|1,500|显示数量|最多输出的结果条数
+@END_PARAMS
+"""
+
+import unreal
+import time
+import os
+import json
+import math
+
+INDEX_VERSION = 1
+
+# 空间网格缓存 {(关卡包名, 单元大小): 网格}
+# 本模块被其他工具导入后常驻 sys.modules，同一编辑器会话内的多次运行可以复用
+# 网格只保存Actor路径和包围盒，不持有Actor对象，切换关卡后旧Actor可以被正常回收
+ACTOR_GRID_CACHE = {}
+
+# 包围盒覆盖超过此数量网格单元的Actor（地形、天空球等）不放入网格，每次查询单独检测
+MAX_CELLS_PER_ACTOR = 64
+
+def main():
+    """主函数：查询材质的使用位置"""
+    print("=== 🔎 场景材质索引工具 ===")
+
+    # 获取参数值
+    global query_material, rebuild_index, show_count
+
+    # 参数初始化
+    try:
+        query_material
+    except NameError:
+        query_material = ""
+
+    try:
+        rebuild_index
+    except NameError:
+        rebuild_index = False
+
+    try:
+        show_count
+    except NameError:
+        show_count = 20
+
+    print("📋 脚本参数:")
+    print(f"  - 查询材质: {query_material}")
+    print(f"  - 完全重建索引: {rebuild_index}")
+    print(f"  - 显示数量: {show_count}")
+
+    index = update_material_index(rebuild_index)
+    if not index:
+        return
+
+    if query_material:
+        usages = query_material_usage(index, query_material)
+        actor_count = len(set(actor_path for actor_path, _, _ in usages))
+        print(f"📋 {to_object_path(query_material)}: {len(usages)} 个材质槽，{actor_count} 个Actor")
+        for actor_path, component_path, slot in usages[:show_count]:
+            print(f"  - {component_path} [槽 {slot}]")
+        if len(usages) > show_count:
+            print(f"  ... 还有 {len(usages) - show_count} 条")
+    else:
+        ranking = sorted(index["materials"].items(), key=lambda item: len(item[1]), reverse=True)
+        print(f"📋 关卡共使用 {len(ranking)} 种材质，引用最多的 {min(show_count, len(ranking))} 种:")
+        for material_path, usages in ranking[:show_count]:
+            print(f"  - {material_path}: {len(usages)} 个材质槽")
+
+    print("🎉 === 查询完成 ===")
+
+def to_object_path(asset_path):
+    """将包路径补全为对象路径，例如 /Game/M/M_Rock -> /Game/M/M_Rock.M_Rock"""
+    asset_path = asset_path.strip()
+    asset_name = asset_path.rsplit('/', 1)[-1]
+    if '.' not in asset_name:
+        asset_path = asset_path + '.' + asset_name
+    return asset_path
+
+def get_current_level_name():
+    """获取当前编辑关卡的包名，失败时返回空字符串"""
+    try:
+        world = unreal.get_editor_subsystem(unreal.UnrealEditorSubsystem).get_editor_world()
+        return world.get_outermost().get_name()
+    except Exception:
+        return ""
+
+def get_package_timestamp(package_name, extension):
+    """
+    返回包文件在磁盘上的修改时间，即包的保存时间
+    只支持 /Game 下的包，无法确定时返回 None（调用方视为已变化）
+    """
+    if not package_name.startswith("/Game/"):
+        return None
+
+    file_path = os.path.join(unreal.Paths.project_content_dir(), package_name[len("/Game/"):] + extension)
+    try:
+        return os.path.getmtime(file_path)
+    except OSError:
+        return None
+
+def get_actor_package_timestamp(package_name):
+    """Actor所在包的保存时间：OFPA的外部Actor包是 .uasset，流送子关卡中的Actor保存在子关卡的 .umap 中"""
+    timestamp = get_package_timestamp(package_name, ".uasset")
+    if timestamp is None:
+        timestamp = get_package_timestamp(package_name, ".umap")
+    return timestamp
+
+def get_dirty_package_names():
+    """返回有未保存修改的包名集合（内容包和关卡包），查询失败时返回 None（调用方视为全部已变化）"""
+    try:
+        packages = (list(unreal.EditorLoadingAndSavingUtils.get_dirty_content_packages())
+                    + list(unreal.EditorLoadingAndSavingUtils.get_dirty_map_packages()))
+        return set(package.get_name() for package in packages)
+    except Exception as e:
+        print(f"⚠️  读取未保存的包失败: {str(e)}")
+        return None
+
+def get_external_actors_prefix(level_name):
+    """关卡外部Actor包的包名前缀，例如 /Game/Maps/Test -> /Game/__ExternalActors__/Maps/Test/"""
+    return "/Game/__ExternalActors__/" + level_name[len("/Game/"):] + "/"
+
+def count_external_actor_files(level_name):
+    """统计磁盘上关卡外部Actor目录中的包文件数量"""
+    external_dir = os.path.join(unreal.Paths.project_content_dir(), "__ExternalActors__", level_name[len("/Game/"):])
+    count = 0
+    for _, _, file_names in os.walk(external_dir):
+        count += sum(1 for file_name in file_names if file_name.endswith(".uasset"))
+    return count
+
+def is_level_unchanged(index, level_name, level_timestamp, dirty_packages):
+    """
+    不访问Actor判断关卡自上次更新索引后是否没有变化：关卡包的保存时间相同，
+    索引中各Actor包的保存时间都相同，这些包和本关卡的外部Actor包都没有未保存修改，
+    且磁盘上的外部Actor包数量与上次更新时相同（检查其他途径新增或删除的外部Actor包）
+    """
+    if dirty_packages is None or level_timestamp is None or index.get("level_timestamp") != level_timestamp:
+        return False
+
+    package_timestamps = {entry["package"]: entry["timestamp"] for entry in index["actors"].values()}
+    external_prefix = get_external_actors_prefix(level_name)
+    for package_name in dirty_packages:
+        if package_name == level_name or package_name in package_timestamps or package_name.startswith(external_prefix):
+            return False
+
+    for package_name, timestamp in package_timestamps.items():
+        if package_name == level_name:
+            continue
+        if timestamp is None or get_actor_package_timestamp(package_name) != timestamp:
+            return False
+
+    return count_external_actor_files(level_name) == index.get("external_actor_files")
+
+def get_index_path(level_name):
+    """索引文件路径：项目 Saved/MaterialUsageIndex 目录下，按关卡包名命名"""
+    file_name = level_name.strip("/").replace("/", "_") + ".json"
+    return os.path.join(unreal.Paths.project_saved_dir(), "MaterialUsageIndex", file_name)
+
+def load_material_index(level_name):
+    """读取关卡的材质索引，不存在或格式不符时返回 None"""
+    index_path = get_index_path(level_name)
+    if not os.path.isfile(index_path):
+        return None
+
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except Exception as e:
+        print(f"⚠️  读取材质索引失败，将重新建立: {str(e)}")
+        return None
+
+    if index.get("version") != INDEX_VERSION or index.get("level") != level_name:
+        return None
+    return index
+
+def save_material_index(index):
+    """将材质索引写入磁盘"""
+    index_path = get_index_path(index["level"])
+    os.makedirs(os.path.dirname(index_path), exist_ok=True)
+
+    with open(index_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+
+    return index_path
+
+def scan_actor_materials(actor, actor_path):
+    """扫描单个Actor的所有网格体组件，返回 [(材质路径, [Actor路径, 组件路径, 材质槽])]"""
+    usages = []
+    for component in actor.get_components_by_class(unreal.MeshComponent):
+        component_path = component.get_path_name()
+        for slot in range(component.get_num_materials()):
+            material = component.get_material(slot)
+            if material:
+                usages.append((material.get_path_name(), [actor_path, component_path, slot]))
+    return usages
+
+def update_material_index(force_rebuild=False):
+    """
+    读取并增量更新当前关卡的材质索引，返回索引字典，失败返回 None
+    索引按关卡包名存放，记录关卡包的保存时间以及每个Actor所在包的保存时间；
+    只有包的保存时间变化、包有未保存修改或新增的Actor才会重新扫描，已删除的Actor从索引中移除。
+    OFPA关卡中每个Actor有自己的外部包，因此关卡变化后通常只需重扫少量Actor。
+    关卡没有任何变化时只检查磁盘上的包文件，不遍历Actor；否则每个Actor调用一次 get_package，
+    包的保存时间按包只查询一次，未保存的包整次更新只查询一次
+    """
+    level_name = get_current_level_name()
+    if not level_name:
+        print("❌ 错误: 无法获取当前关卡")
+        return None
+
+    start_time = time.time()
+    level_timestamp = get_package_timestamp(level_name, ".umap")
+    dirty_packages = get_dirty_package_names()
+    index = None if force_rebuild else load_material_index(level_name)
+    if index is None:
+        print("🔍 建立材质索引（完整扫描）...")
+        index = {"version": INDEX_VERSION, "level": level_name, "actors": {}, "materials": {}}
+    elif is_level_unchanged(index, level_name, level_timestamp, dirty_packages):
+        print(f"✅ 关卡未变化，直接使用材质索引: {len(index['actors'])} 个Actor，{len(index['materials'])} 种材质，"
+              f"用时 {time.time() - start_time:.2f}秒")
+        return index
+    else:
+        print("🔍 增量更新材质索引...")
+
+    actors = unreal.EditorLevelLibrary.get_all_level_actors()
+    old_actors = index["actors"]
+    new_actors = {}
+    changed_actor_paths = set()
+    new_usages = []
+    # 包名 -> 保存时间，流送子关卡中的Actor共用子关卡的包
+    package_timestamps = {}
+
+    for actor in actors:
+        try:
+            actor_path = actor.get_path_name()
+            package_name = actor.get_package().get_name()
+
+            if package_name in package_timestamps:
+                timestamp = package_timestamps[package_name]
+            else:
+                timestamp = level_timestamp if package_name == level_name else get_actor_package_timestamp(package_name)
+                package_timestamps[package_name] = timestamp
+
+            new_actors[actor_path] = {"package": package_name, "timestamp": timestamp}
+
+            is_dirty = dirty_packages is None or package_name in dirty_packages
+            old_entry = old_actors.get(actor_path)
+            if old_entry and timestamp is not None and old_entry["timestamp"] == timestamp and not is_dirty:
+                continue
+
+            changed_actor_paths.add(actor_path)
+            new_usages.extend(scan_actor_materials(actor, actor_path))
+        except Exception as e:
+            print(f"⚠️  索引Actor失败: {actor.get_name()} - {str(e)}")
+
+    # 移除已变化和已删除的Actor的旧记录，再合并新扫描的记录
+    removed_actor_paths = set(old_actors) - set(new_actors)
+    stale_actor_paths = changed_actor_paths | removed_actor_paths
+    materials = {}
+    if stale_actor_paths:
+        for material_path, usages in index["materials"].items():
+            kept = [usage for usage in usages if usage[0] not in stale_actor_paths]
+            if kept:
+                materials[material_path] = kept
+    else:
+        materials = index["materials"]
+
+    for material_path, usage in new_usages:
+        materials.setdefault(material_path, []).append(usage)
+
+    # 关卡包和外部Actor目录的状态变化后也要保存，下次运行才能判断关卡未变化
+    external_actor_files = count_external_actor_files(level_name) if level_timestamp is not None else None
+    level_changed = (index.get("level_timestamp") != level_timestamp
+                     or index.get("external_actor_files") != external_actor_files)
+
+    index["level_timestamp"] = level_timestamp
+    index["external_actor_files"] = external_actor_files
+    index["actors"] = new_actors
+    index["materials"] = materials
+
+    if stale_actor_paths or force_rebuild or level_changed:
+        index_path = save_material_index(index)
+        print(f"💾 材质索引已保存: {index_path}")
+
+    print(f"✅ 材质索引就绪: {len(new_actors)} 个Actor，{len(materials)} 种材质，"
+          f"重扫 {len(changed_actor_paths)} 个，移除 {len(removed_actor_paths)} 个，"
+          f"用时 {time.time() - start_time:.2f}秒")
+    return index
+
+def query_material_usage(index, material_path):
+    """返回使用指定材质的 [(Actor路径, 组件路径, 材质槽)]"""
+    return [tuple(usage) for usage in index["materials"].get(to_object_path(material_path), [])]
+
+def parse_vector(text):
+    """解析 "X,Y,Z" 格式的坐标字符串"""
+    values = [float(value) for value in str(text).replace(" ", "").split(",")]
+    if len(values) != 3:
+        raise ValueError(f"坐标格式应为 X,Y,Z: {text}")
+    return tuple(values)
+
+def make_region(shape, center, extent=None, radius=0.0):
+    """
+    创建区域描述，shape 为 box 或 sphere
+    center / extent 为 (X, Y, Z)，extent 是盒体的半尺寸
+    """
+    if shape == "sphere":
+        extent = (radius, radius, radius)
+    return {
+        "shape": shape,
+        "center": center,
+        "radius": radius,
+        "min": tuple(center[i] - extent[i] for i in range(3)),
+        "max": tuple(center[i] + extent[i] for i in range(3)),
+    }
+
+def bounds_in_region(bounds_min, bounds_max, region):
+    """判断轴对齐包围盒是否与区域相交"""
+    for i in range(3):
+        if bounds_max[i] < region["min"][i] or bounds_min[i] > region["max"][i]:
+            return False
+
+    if region["shape"] == "sphere":
+        # 包围盒上离球心最近的点到球心的距离
+        distance_squared = 0.0
+        for i in range(3):
+            nearest = min(max(region["center"][i], bounds_min[i]), bounds_max[i])
+            distance_squared += (nearest - region["center"][i]) ** 2
+        return distance_squared <= region["radius"] ** 2
+
+    return True
+
+def get_actor_bounds(actor):
+    """返回Actor包围盒的 (最小点, 最大点)"""
+    origin, extent = actor.get_actor_bounds(False)
+    return (
+        (origin.x - extent.x, origin.y - extent.y, origin.z - extent.z),
+        (origin.x + extent.x, origin.y + extent.y, origin.z + extent.z),
+    )
+
+def cell_range(bounds_min, bounds_max, cell_size):
+    """包围盒在XY平面上覆盖的网格单元范围 (x0, x1, y0, y1)"""
+    return (
+        int(math.floor(bounds_min[0] / cell_size)), int(math.floor(bounds_max[0] / cell_size)),
+        int(math.floor(bounds_min[1] / cell_size)), int(math.floor(bounds_max[1] / cell_size)),
+    )
+
+def build_actor_grid(actors, cell_size):
+    """
+    按Actor包围盒建立XY平面上的均匀网格
+    返回 {"cell_size", "entries": [(Actor路径, 最小点, 最大点)], "cells": {(x, y): [条目序号]}, "oversized": [条目序号]}
+    """
+    entries = []
+    cells = {}
+    oversized = []
+
+    for actor in actors:
+        try:
+            actor_path = actor.get_path_name()
+            bounds_min, bounds_max = get_actor_bounds(actor)
+        except Exception:
+            continue
+
+        entry_index = len(entries)
+        entries.append((actor_path, bounds_min, bounds_max))
+
+        x0, x1, y0, y1 = cell_range(bounds_min, bounds_max, cell_size)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > MAX_CELLS_PER_ACTOR:
+            oversized.append(entry_index)
+            continue
+
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                cells.setdefault((x, y), []).append(entry_index)
+
+    return {"cell_size": cell_size, "entries": entries, "cells": cells, "oversized": oversized}
+
+def get_actor_grid(cell_size, force_rebuild=False):
+    """
+    获取当前关卡的空间网格，同一会话内按 (关卡, 单元大小) 缓存复用，复用时不遍历关卡中的Actor
+    切换关卡后自动重建；Actor移动或新增后需要 force_rebuild 重建（已删除的Actor在查询时跳过）
+    """
+    cache_key = (get_current_level_name(), float(cell_size))
+    if not force_rebuild and cache_key in ACTOR_GRID_CACHE:
+        grid = ACTOR_GRID_CACHE[cache_key]
+        print(f"♻️  复用空间网格: {len(grid['entries'])} 个Actor，{len(grid['cells'])} 个单元")
+        return grid
+
+    start_time = time.time()
+    actors = unreal.EditorLevelLibrary.get_all_level_actors()
+    grid = build_actor_grid(actors, cell_size)
+
+    # 只保留当前关卡的网格
+    ACTOR_GRID_CACHE.clear()
+    ACTOR_GRID_CACHE[cache_key] = grid
+
+    print(f"✅ 空间网格已建立: {len(grid['entries'])} 个Actor，{len(grid['cells'])} 个单元，"
+          f"超大Actor {len(grid['oversized'])} 个，用时 {time.time() - start_time:.2f}秒")
+    return grid
+
+def query_actors_in_region(grid, region):
+    """
+    返回包围盒与区域相交的Actor，只检查区域覆盖的网格单元中的Actor
+    命中的条目按路径重新查找Actor对象，已删除的Actor会被跳过
+    """
+    x0, x1, y0, y1 = cell_range(region["min"], region["max"], grid["cell_size"])
+
+    candidates = set(grid["oversized"])
+    cells = grid["cells"]
+    if (x1 - x0 + 1) * (y1 - y0 + 1) > len(cells):
+        # 区域比已占用的单元还多时直接遍历已占用的单元
+        for (x, y), entry_indices in cells.items():
+            if x0 <= x <= x1 and y0 <= y <= y1:
+                candidates.update(entry_indices)
+    else:
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                candidates.update(cells.get((x, y), ()))
+
+    actors = []
+    for entry_index in sorted(candidates):
+        actor_path, bounds_min, bounds_max = grid["entries"][entry_index]
+        if not bounds_in_region(bounds_min, bounds_max, region):
+            continue
+        actor = unreal.find_object(None, actor_path)
+        if actor and unreal.SystemLibrary.is_valid(actor):
+            actors.append(actor)
+
+    return actors
+
+if __name__ == "__main__":
+    main()
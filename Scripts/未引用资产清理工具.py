@@ -0,0 +1,429 @@
+"""
+@PLUGIN_INFO
+id: 7R3wD8nK
+name: 未引用资产清理工具
+description: 通过资产注册表一次性建立所有已挂载内容（项目、插件和引擎）的引用图，以关卡、主资产、项目设置中引用的资产、/Game 之外的内容和指定的根路径为根标记所有可达资产，不可达的资产作为清理候选按磁盘大小输出，可分批删除。删除前的引用检查基于同一张引用图完成，不再逐个资产查询引用者
+category: 资产管理
+favorite: false
+usage: 设置扫描路径后运行脚本，输出未引用资产及其磁盘大小并写入报告；确认报告无误后开启删除未引用资产再运行一次。只通过代码或配置按路径加载的资产请填入额外根路径
+@END_INFO
+
+@PLUGIN_PARAMS
+scan_path|folder|/Game||扫描路径|只报告和删除该路径下的未引用资产，引用图始终覆盖所有已挂载的内容
+extra_root_paths|string|||额外根路径|逗号分隔的文件夹或资产包路径，其中的资产视为根（例如通过代码或配置按路径加载的资产）
+delete_assets|bool|false||删除未引用资产|关闭时只输出清理候选；开启时按批删除候选资产
+delete_batch_size|int|200|50,1000|删除批次数量|每次 delete_loaded_assets 调用删除的资产数量
+show_count|int|50|1,1000|显示数量|按磁盘大小输出的最多候选条数
+report_file|file|||报告文件|候选列表JSON的输出路径，留空写入项目Saved/AssetOrganizer目录
+@END_PARAMS
+"""
+
+import unreal
+import time
+import os
+import json
+
+WORLD_CLASS_PATH = "/Script/Engine.World"
+
+# 分区世界的外部Actor和外部对象包不被关卡包引用，属于关卡本身，始终视为根
+ROOT_PACKAGE_PREFIXES = ["/Game/__ExternalActors__/", "/Game/__ExternalObjects__/"]
+
+# 项目设置中按路径引用资产的属性：(设置类名, [软对象/软类路径属性], [目录路径数组属性], [文件路径数组属性])
+# 这些引用不在资产注册表中，对应的资产（默认游戏模式、GameInstance、始终烘焙的目录等）必须视为根
+CONFIG_ROOT_SETTINGS = [
+    ("GameMapsSettings",
+     ["game_default_map", "editor_startup_map", "transition_map", "server_default_map",
+      "global_default_game_mode", "global_default_server_game_mode", "game_instance_class"],
+     [], []),
+    ("ProjectPackagingSettings", [], ["directories_to_always_cook"], ["maps_to_cook"]),
+]
+
+# 磁盘上属于同一个包的文件扩展名
+PACKAGE_FILE_EXTENSIONS = [".uasset", ".umap", ".uexp", ".ubulk", ".uptnl"]
+
+def main():
+    """主函数：查找并可选删除未引用资产"""
+    print("=== 🧹 未引用资产清理工具 ===")
+
+    # 获取参数值
+    global scan_path, extra_root_paths, delete_assets, delete_batch_size, show_count, report_file
+
+    # 参数初始化
+    try:
+        scan_path
+    except NameError:
+        scan_path = "/Game"
+
+    try:
+        extra_root_paths
+    except NameError:
+        extra_root_paths = ""
+
+    try:
+        delete_assets
+    except NameError:
+        delete_assets = False
+
+    try:
+        delete_batch_size
+    except NameError:
+        delete_batch_size = 200
+
+    try:
+        show_count
+    except NameError:
+        show_count = 50
+
+    try:
+        report_file
+    except NameError:
+        report_file = ""
+
+    print("📋 脚本参数:")
+    print(f"  - 扫描路径: {scan_path}")
+    print(f"  - 额外根路径: {extra_root_paths or '无'}")
+    print(f"  - 删除未引用资产: {delete_assets}")
+    print(f"  - 删除批次数量: {delete_batch_size}")
+    print(f"  - 显示数量: {show_count}")
+
+    start_time = time.time()
+    graph = build_reference_graph()
+    if not graph:
+        return
+
+    extra_roots = [path.strip() for path in extra_root_paths.split(",") if path.strip()]
+    roots = find_root_packages(graph, extra_roots + collect_config_root_paths())
+    reachable = mark_reachable(graph, roots)
+    candidates = find_unreferenced_packages(graph, reachable, scan_path)
+    print(f"🔗 根 {len(roots)} 个，可达 {len(reachable)} 个，扫描路径下未引用 {len(candidates)} 个，"
+          f"用时 {time.time() - start_time:.2f}秒")
+
+    report = build_report(graph, candidates)
+    print_report(report)
+    write_report(report)
+
+    if delete_assets and candidates:
+        delete_unreferenced_assets(graph, candidates)
+
+    print("🎉 === 完成 ===")
+
+def build_reference_graph():
+    """
+    一次查询所有已挂载内容（项目、插件和引擎）的全部资产，再逐包查询一次依赖，建立正向依赖图并在内存中反转出引用者图，
+    插件或其他挂载点中的引用者同样计入
+    返回 {"assets": {包名: 资产数据}, "dependencies": {包名: 依赖包集合}, "referencers": {包名: 引用者包集合}}
+    """
+    print("🔍 读取资产注册表并建立引用图...")
+    asset_registry = unreal.AssetRegistryHelpers.get_asset_registry()
+    asset_registry.wait_for_completion()
+
+    asset_filter = unreal.ARFilter(
+        package_paths=["/"],
+        recursive_paths=True,
+        include_only_on_disk_assets=True
+    )
+    assets = {}
+    try:
+        for asset_data in asset_registry.get_assets(asset_filter):
+            package_name = str(asset_data.package_name)
+            # 每个包只记录一个资产数据，关卡包优先，用于判断根
+            if package_name not in assets or is_map_asset(asset_data):
+                assets[package_name] = asset_data
+    except Exception as e:
+        print(f"❌ 读取资产注册表失败: {e}")
+        return None
+
+    # 包级硬引用、软引用和资产管理器的管理引用都会让资产被烘焙
+    dependency_options = unreal.AssetRegistryDependencyOptions(
+        include_soft_package_references=True,
+        include_hard_package_references=True,
+        include_searchable_names=False,
+        include_soft_management_references=True,
+        include_hard_management_references=True
+    )
+    dependencies = {}
+    referencers = {package_name: set() for package_name in assets}
+    for package_name in assets:
+        package_dependencies = set()
+        for dependency in asset_registry.get_dependencies(package_name, dependency_options) or []:
+            dependency = str(dependency)
+            if dependency in assets and dependency != package_name:
+                package_dependencies.add(dependency)
+                referencers[dependency].add(package_name)
+        dependencies[package_name] = package_dependencies
+
+    edge_count = sum(len(package_dependencies) for package_dependencies in dependencies.values())
+    print(f"✅ 引用图: {len(assets)} 个包，{edge_count} 条引用")
+    return {"assets": assets, "dependencies": dependencies, "referencers": referencers}
+
+def is_map_asset(asset_data):
+    """资产是否为关卡"""
+    class_path = asset_data.asset_class_path
+    return f"{class_path.package_name}.{class_path.asset_name}" == WORLD_CLASS_PATH
+
+def is_primary_asset(asset_data):
+    """资产管理器登记的主资产在注册表标签中带有 PrimaryAssetType"""
+    try:
+        return bool(asset_data.get_tag_value("PrimaryAssetType"))
+    except Exception:
+        return False
+
+def soft_path_to_package(value):
+    """软对象路径、软类路径或路径字符串转换为包名，无法识别时返回空字符串"""
+    try:
+        text = value.export_text() if hasattr(value, "export_text") else str(value)
+    except Exception:
+        text = str(value)
+    text = text.strip().strip('"').strip("'")
+    # 可能带有类前缀，例如 /Script/Engine.World'/Game/Maps/Main.Main'
+    if "'" in text:
+        text = text.split("'")[1]
+    package_name = text.split(".")[0]
+    return package_name if package_name.startswith("/") and package_name != "/" else ""
+
+def collect_config_root_paths():
+    """读取项目设置中按路径引用的资产和始终烘焙的目录，返回包名或文件夹路径列表"""
+    root_paths = []
+    for class_name, soft_properties, directory_properties, file_properties in CONFIG_ROOT_SETTINGS:
+        settings_class = getattr(unreal, class_name, None)
+        if settings_class is None:
+            continue
+        try:
+            settings = unreal.get_default_object(settings_class)
+        except Exception as e:
+            print(f"⚠️  读取项目设置失败: {class_name} 错误: {e}")
+            continue
+
+        for property_name in soft_properties + directory_properties + file_properties:
+            try:
+                value = settings.get_editor_property(property_name)
+            except Exception:
+                continue
+            if property_name in soft_properties:
+                values = [value]
+            elif property_name in directory_properties:
+                values = [item.get_editor_property("path") for item in value or []]
+            else:
+                values = [item.get_editor_property("file_path") for item in value or []]
+
+            for item in values:
+                package_name = soft_path_to_package(item)
+                if package_name:
+                    root_paths.append(package_name)
+
+    print(f"⚙️  项目设置中的根: {len(root_paths)} 个")
+    return root_paths
+
+def find_root_packages(graph, extra_roots):
+    """
+    根：关卡、主资产、分区世界的外部Actor/对象包、/Game 之外的内容（插件和引擎内容不会被删除，
+    它们引用的项目资产必须保留），以及项目设置和额外根路径中的包或文件夹
+    """
+    extra_prefixes = [root.rstrip("/") + "/" for root in extra_roots]
+    roots = set()
+    for package_name, asset_data in graph["assets"].items():
+        if (is_map_asset(asset_data) or is_primary_asset(asset_data)
+                or not package_name.startswith("/Game/")
+                or package_name in extra_roots
+                or any(package_name.startswith(prefix) for prefix in ROOT_PACKAGE_PREFIXES + extra_prefixes)):
+            roots.add(package_name)
+    return roots
+
+def mark_reachable(graph, roots):
+    """沿依赖图从根出发标记所有可达的包"""
+    reachable = set(roots)
+    pending = list(roots)
+    while pending:
+        package_name = pending.pop()
+        for dependency in graph["dependencies"].get(package_name, ()):
+            if dependency not in reachable:
+                reachable.add(dependency)
+                pending.append(dependency)
+    return reachable
+
+def find_unreferenced_packages(graph, reachable, path):
+    """扫描路径下不可达的包"""
+    prefix = path.rstrip("/") + "/"
+    return set(
+        package_name for package_name in graph["assets"]
+        if package_name not in reachable and package_name.startswith(prefix)
+    )
+
+def get_package_disk_size(package_name):
+    """包在磁盘上所有文件的大小之和，只计算项目 Content 中的包"""
+    if not package_name.startswith("/Game/"):
+        return 0
+    file_base = os.path.join(unreal.Paths.project_content_dir(), package_name[len("/Game/"):])
+    total_size = 0
+    for extension in PACKAGE_FILE_EXTENSIONS:
+        try:
+            total_size += os.path.getsize(file_base + extension)
+        except OSError:
+            continue
+    return total_size
+
+def build_report(graph, candidates):
+    """整理清理候选：按磁盘大小排序，附带类和引用者数量（这些引用者同样不可达）"""
+    entries = []
+    for package_name in candidates:
+        asset_data = graph["assets"][package_name]
+        entries.append({
+            "package": package_name,
+            "class": str(asset_data.asset_class_path.asset_name),
+            "size": get_package_disk_size(package_name),
+            "referencers": len(graph["referencers"][package_name]),
+        })
+    entries.sort(key=lambda entry: (-entry["size"], entry["package"]))
+
+    class_totals = {}
+    for entry in entries:
+        count, size = class_totals.get(entry["class"], (0, 0))
+        class_totals[entry["class"]] = (count + 1, size + entry["size"])
+
+    return {
+        "scan_path": scan_path,
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "total_size": sum(entry["size"] for entry in entries),
+        "classes": {class_name: {"count": count, "size": size} for class_name, (count, size) in class_totals.items()},
+        "assets": entries,
+    }
+
+def print_report(report):
+    """输出清理候选汇总和按磁盘大小排列的前若干条"""
+    entries = report["assets"]
+    if not entries:
+        print("✅ 没有未引用的资产")
+        return
+
+    print(f"📦 未引用资产: {len(entries)} 个，共 {report['total_size'] / 1024.0 / 1024.0:.2f} MB")
+    print("📊 按类统计:")
+    for class_name, totals in sorted(report["classes"].items(), key=lambda item: -item[1]["size"]):
+        print(f"  - {class_name}: {totals['count']} 个，{totals['size'] / 1024.0 / 1024.0:.2f} MB")
+
+    print(f"📋 最大的 {min(show_count, len(entries))} 个:")
+    for entry in entries[:show_count]:
+        print(f"  - {entry['size'] / 1024.0 / 1024.0:8.2f} MB  {entry['class']}  {entry['package']}")
+    if len(entries) > show_count:
+        print(f"  ... 还有 {len(entries) - show_count} 个")
+
+def write_report(report):
+    """把清理候选写入JSON报告"""
+    report_path = report_file or os.path.join(unreal.Paths.project_saved_dir(), "AssetOrganizer", "unreferenced_assets.json")
+    try:
+        report_folder = os.path.dirname(report_path)
+        if report_folder:
+            os.makedirs(report_folder, exist_ok=True)
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+        print(f"💾 报告已写入: {report_path}")
+    except Exception as e:
+        print(f"⚠️  写入报告失败: {e}")
+
+def order_for_deletion(graph, candidates):
+    """
+    按引用图排出删除顺序：引用者先于被引用者，互相引用的包保持在一起放到最后
+    只有所有引用者都在候选中的包才会被删除：不可达的引用者在扫描路径外时保留该包；
+    删除前再向资产注册表确认一次引用者，有引用图之外的引用者（例如未保存的新包）时同样保留
+    """
+    asset_registry = unreal.AssetRegistryHelpers.get_asset_registry()
+    dependency_options = unreal.AssetRegistryDependencyOptions(
+        include_soft_package_references=True,
+        include_hard_package_references=True,
+        include_searchable_names=False,
+        include_soft_management_references=True,
+        include_hard_management_references=True
+    )
+    assets = graph["assets"]
+    deletable = set()
+    for package_name in candidates:
+        outside_referencers = [
+            str(name) for name in asset_registry.get_referencers(package_name, dependency_options) or []
+            if str(name) not in assets
+        ]
+        if outside_referencers:
+            print(f"⚠️  {package_name} 被引用图之外的包引用（{min(outside_referencers)} 等），保留不删除")
+            continue
+        deletable.add(package_name)
+
+    # 保留的包让它依赖的候选也必须保留：先找出有非候选引用者的包，再沿依赖边用工作队列传播，每条边只处理一次
+    kept = [package_name for package_name in deletable if not graph["referencers"][package_name] <= deletable]
+    while kept:
+        package_name = kept.pop()
+        if package_name not in deletable:
+            continue
+        deletable.discard(package_name)
+        for dependency in graph["dependencies"][package_name]:
+            if dependency in deletable:
+                kept.append(dependency)
+
+    # 在候选子图上做拓扑排序：没有候选引用者的包先删除
+    remaining_referencers = {
+        package_name: len(graph["referencers"][package_name] & deletable) for package_name in deletable
+    }
+    ready = sorted(package_name for package_name, count in remaining_referencers.items() if count == 0)
+    ordered = []
+    while ready:
+        package_name = ready.pop()
+        ordered.append(package_name)
+        for dependency in graph["dependencies"][package_name]:
+            if dependency in remaining_referencers:
+                remaining_referencers[dependency] -= 1
+                if remaining_referencers[dependency] == 0:
+                    ready.append(dependency)
+
+    ordered_set = set(ordered)
+    ordered.extend(sorted(package_name for package_name in deletable if package_name not in ordered_set))
+    return ordered, len(candidates) - len(deletable)
+
+def delete_unreferenced_assets(graph, candidates):
+    """
+    分批删除未引用资产：引用检查已在引用图上一次完成，每批通过一次 delete_loaded_assets 删除，
+    整批失败时逐个删除本批次
+    """
+    ordered, kept_count = order_for_deletion(graph, candidates)
+    if kept_count:
+        print(f"⚠️  {kept_count} 个候选仍被扫描路径外的未引用资产或引用图之外的包引用，保留不删除")
+    if not ordered:
+        return 0
+
+    print(f"🗑️  分批删除 {len(ordered)} 个未引用资产...")
+    deleted_count = 0
+    for batch_start in range(0, len(ordered), delete_batch_size):
+        batch = ordered[batch_start:batch_start + delete_batch_size]
+        batch_index = batch_start // delete_batch_size + 1
+        start_time = time.time()
+
+        assets = []
+        for package_name in batch:
+            asset = graph["assets"][package_name].get_asset()
+            if asset:
+                assets.append(asset)
+
+        try:
+            batch_deleted = len(assets) if assets and unreal.EditorAssetLibrary.delete_loaded_assets(assets) else 0
+        except Exception as e:
+            print(f"⚠️  批量删除失败，逐个删除本批次: {e}")
+            batch_deleted = 0
+        if assets and not batch_deleted:
+            batch_deleted = delete_batch_individually(graph, batch)
+
+        deleted_count += batch_deleted
+        print(f"  ✅ 批次 {batch_index}: 删除 {batch_deleted}/{len(batch)} 个，用时 {time.time() - start_time:.2f}秒")
+
+    print(f"✅ 删除完成: {deleted_count} 个")
+    return deleted_count
+
+def delete_batch_individually(graph, batch):
+    """逐个删除一批资产，跳过已经删除的资产"""
+    deleted_count = 0
+    for package_name in batch:
+        object_path = f"{package_name}.{graph['assets'][package_name].asset_name}"
+        try:
+            if not unreal.EditorAssetLibrary.does_asset_exist(object_path) or unreal.EditorAssetLibrary.delete_asset(object_path):
+                deleted_count += 1
+        except Exception as e:
+            print(f"删除失败: {object_path} 错误: {e}")
+    return deleted_count
+
+if __name__ == "__main__":
+    main()
@@ -14,15 +14,87 @@ batch_size|int|100|50,500|批处理数量|控制每次处理的资产数量，
 enable_rename|bool|true||自动重命名|当发现同名资产时是否自动重命名
 scan_path|folder|/Game||扫描路径|使用📁按钮选择要扫描的文件夹，或使用📂按钮手动输入路径
 use_batch_operations|bool|true||批量操作|是否使用批量操作API提高处理效率
+use_dependency_batching|bool|true||按依赖分批|根据资产注册表的引用关系分批，共享引用者的资产放在同一批，减少引用者被反复修复和标脏
+use_manifest|bool|true||整理清单|在项目Saved目录记录已整理的资产，再次运行时跳过清单中和已在分类文件夹中的资产，只处理新增资产
+use_move_journal|bool|true||移动日志|每批移动前后写入JSON Lines预写日志并落盘，编辑器崩溃后可以从日志恢复
+resume_from_journal|bool|true||从日志恢复|发现上次未完成的移动日志时，先核对并补完日志中的批次，再继续整理剩余资产；关闭时丢弃旧日志
+checkpoint_interval|int|10|1,100|检查点间隔|开启移动日志时每移动多少批保存一次涉及的包，恢复时跳过已保存的批次；越小崩溃后需要重做的越少，保存次数越多
+rules_file|file|||分类规则文件|JSON/YAML规则文件，包含类→文件夹、名称正则和资产注册表标签值规则，留空使用内置分类
+dry_run|bool|false||只生成计划|只扫描并规划移动，把完整的移动计划（源、目标、重名后缀、类别、批次）写入JSON并输出汇总，不移动或保存任何资产
+plan_file|file|||计划文件|只生成计划时的输出路径，留空写入项目Saved/AssetOrganizer目录；只对比计划时作为新计划读取
+compare_plan_file|file|||对比计划|只生成计划时与该计划文件对比，输出新增、移除和目标变化的移动
+diff_plans_only|bool|false||只对比计划|直接对比计划文件和对比计划两个已有的计划，不扫描、不重新规划，也不移动任何资产
+enable_profiling|bool|false||批次性能分析|记录每个批次和每个资产的移动耗时，输出分位数、最慢资产和按类统计，并导出Chrome追踪JSON
+duplicates_file|file|||重复资产报告|Tools/重复资产检测工具.py 生成的报告，整理前把每组重复资产合并到保留的资产，引用改为指向保留的资产
+profile_trace_file|file|||追踪文件|Chrome追踪JSON的输出路径（chrome://tracing 或 Perfetto 打开），留空写入项目Saved/AssetOrganizer目录
 @END_PARAMS
 """
 
 import unreal
 import time
+import os
+import re
+import math
+import json
+
+# 内置资产分类：(目标子文件夹, [资产类路径])，每个类别用一次 ARFilter 查询
+ASSET_CATEGORIES = [
+    ("Meshes", ["/Script/Engine.StaticMesh"]),
+    ("Materials", ["/Script/Engine.Material", "/Script/Engine.MaterialInstanceConstant"]),
+    ("Textures", ["/Script/Engine.Texture2D", "/Script/Engine.TextureCube"]),
+    ("Blueprints", ["/Script/Engine.Blueprint"]),
+    ("Animations", ["/Script/Engine.AnimSequence", "/Script/Engine.AnimBlueprint"]),
+    ("Audio", ["/Script/Engine.SoundWave", "/Script/Engine.SoundCue"]),
+]
+OTHER_CATEGORY = "Other"
+REDIRECTOR_CLASS_PATH = "/Script/CoreUObject.ObjectRedirector"
+
+# 磁盘上属于同一个包的文件扩展名
+PACKAGE_FILE_EXTENSIONS = [".uasset", ".umap", ".uexp", ".ubulk", ".uptnl"]
+
+MANIFEST_VERSION = 1
+PLAN_VERSION = 1
+
+# 对比计划时每类差异最多输出的条数
+PLAN_DIFF_PRINT_LIMIT = 20
+
+# 性能分析：最慢批次和最慢资产表的行数，按批大小分组统计的区间下限
+PROFILE_TOP_COUNT = 10
+PROFILE_BATCH_SIZE_BUCKETS = [1, 50, 100, 200, 500]
+
+# 本次运行中有资产移出的源文件夹，重定向器只会出现在这些文件夹中
+moved_source_folders = set()
+
+# 整理清单：已整理资产的包名 -> {"source", "category"}，按目标路径分别保存
+organize_manifest = {}
+
+# 本次扫描到的已整理资产包名，保存清单时用于移除已删除或移走的记录
+seen_packages = set()
+
+# 本次移动涉及的包（移动后的资产包和源位置的重定向器包），保存时只保存这些包及其引用者
+moved_packages = set()
+
+# 移动日志：打开的日志文件和下一个批次号，未开启日志时为 None
+move_journal = None
+next_journal_batch_id = 0
+
+# 检查点：上次保存之后完成的日志批次号和这些批次移动涉及的包
+checkpoint_batch_ids = []
+checkpoint_packages = set()
+
+# 性能分析：Chrome 追踪事件、每批耗时和每个资产的移动耗时，未开启分析时不记录
+profile_events = []
+batch_timings = []
+asset_timings = []
+profile_start_time = 0.0
+profile_batch_number = 0
 
 def main():
     # 获取参数值
-    global target_base_path, batch_size, enable_rename, scan_path, use_batch_operations
+    global target_base_path, batch_size, enable_rename, scan_path, use_batch_operations, use_manifest
+    global use_dependency_batching, rules_file, use_move_journal, resume_from_journal, checkpoint_interval
+    global dry_run, plan_file, compare_plan_file, diff_plans_only, enable_profiling, profile_trace_file, profile_start_time
+    global duplicates_file
     
     # 参数初始化
     try:
@@ -50,11 +122,123 @@ def main():
     except NameError:
         use_batch_operations = True
     
+    try:
+        use_manifest
+    except NameError:
+        use_manifest = True
+    
+    try:
+        use_dependency_batching
+    except NameError:
+        use_dependency_batching = True
+    
+    try:
+        use_move_journal
+    except NameError:
+        use_move_journal = True
+    
+    try:
+        resume_from_journal
+    except NameError:
+        resume_from_journal = True
+    
+    try:
+        checkpoint_interval
+    except NameError:
+        checkpoint_interval = 10
+    
+    try:
+        rules_file
+    except NameError:
+        rules_file = ""
+    
+    try:
+        dry_run
+    except NameError:
+        dry_run = False
+    
+    try:
+        plan_file
+    except NameError:
+        plan_file = ""
+    
+    try:
+        compare_plan_file
+    except NameError:
+        compare_plan_file = ""
+    
+    try:
+        diff_plans_only
+    except NameError:
+        diff_plans_only = False
+    
+    try:
+        enable_profiling
+    except NameError:
+        enable_profiling = False
+    
+    try:
+        profile_trace_file
+    except NameError:
+        profile_trace_file = ""
+    
+    try:
+        duplicates_file
+    except NameError:
+        duplicates_file = ""
+    
     # @PROGRESS: 开始批量操作模式...
     print("=== 🚀 批量操作资产整理工具启动 ===")
     print("目标路径: " + target_base_path)
     print("扫描路径: " + scan_path)
     print("批量操作: " + ("开启" if use_batch_operations else "关闭"))
+    print("整理清单: " + ("开启" if use_manifest else "关闭"))
+    print("按依赖分批: " + ("开启" if use_dependency_batching else "关闭"))
+    print("移动日志: " + ("开启（每 " + str(checkpoint_interval) + " 批保存检查点）" if use_move_journal else "关闭"))
+    print("分类规则: " + (rules_file if rules_file else "内置"))
+    print("重复资产报告: " + (duplicates_file if duplicates_file else "无"))
+    print("只生成计划: " + ("是" if dry_run else "否"))
+    print("批次性能分析: " + ("开启" if enable_profiling else "关闭"))
+    
+    # 两个计划文件都已存在时直接对比，不需要扫描资产
+    if diff_plans_only:
+        if not plan_file or not compare_plan_file:
+            print("❌ 错误: 只对比计划需要同时填写计划文件和对比计划")
+            return
+        diff_move_plans(load_move_plan(compare_plan_file), load_move_plan(plan_file))
+        return
+    
+    category_rules = load_category_rules(rules_file)
+    if category_rules is None:
+        return
+    
+    moved_source_folders.clear()
+    seen_packages.clear()
+    moved_packages.clear()
+    checkpoint_batch_ids.clear()
+    checkpoint_packages.clear()
+    organize_manifest.clear()
+    profile_events.clear()
+    batch_timings.clear()
+    asset_timings.clear()
+    profile_start_time = time.time()
+    if use_manifest:
+        organize_manifest.update(load_organize_manifest())
+        print("📋 整理清单: " + str(len(organize_manifest)) + " 条记录")
+    
+    # 上次运行崩溃时留下的日志
+    unfinished_journal = None
+    if use_move_journal and not dry_run:
+        unfinished_journal = read_move_journal()
+        if unfinished_journal and not resume_from_journal:
+            print("⚠️  丢弃上次未完成的移动日志")
+            unfinished_journal = None
+        open_move_journal(unfinished_journal)
+    journal_finished = False
+    
+    if dry_run:
+        run_dry_run(category_rules)
+        return
     
     # 禁用自动保存和实时更新
     print("\n⚡ 正在禁用实时保存和更新...")
@@ -63,57 +247,92 @@ def main():
     try:
         start_time = time.time()
         
-        # 快速扫描
-        # @PROGRESS: 快速扫描资产中...
-        print("🔍 扫描资产...")
-        scan_start = time.time()
-        categorized_assets = scan_assets_fast(scan_path)
-        scan_time = time.time() - scan_start
+        # 按类别流式扫描，每扫完一个类别立即移动，不等待全部扫描完成
+        # @PROGRESS: 扫描并移动资产中...
+        print("🔍 按类别扫描并移动资产...")
+        scan_time = 0.0
+        move_time = 0.0
+        total_to_process = 0
+        processed_count = 0
+        consolidated_count = 0
         
-        total_to_process = sum(len(assets) for assets in categorized_assets.values())
+        # 先补完上次崩溃时未完成的批次，已完成的移动计入本次保存和清理
+        if unfinished_journal:
+            move_start = time.time()
+            processed_count += resume_move_journal(*unfinished_journal)
+            move_time += time.time() - move_start
+            record_profile_event("从日志恢复", "move", move_start)
         
-        if total_to_process == 0:
-            print("没有需要整理的资产")
-            return
+        # 先合并重复资产，被合并的资产变为重定向器，不再参与分类移动
+        if duplicates_file:
+            consolidate_start = time.time()
+            consolidated_count = consolidate_duplicate_assets(duplicates_file)
+            move_time += time.time() - consolidate_start
+            record_profile_event("合并重复资产", "consolidate", consolidate_start, {"assets": consolidated_count})
         
-        print("✅ 扫描完成：" + str(total_to_process) + " 个资产，用时 " + str(scan_time) + "秒")
-        for category, assets in categorized_assets.items():
-            if assets:
-                print("  " + category + ": " + str(len(assets)) + " 个")
+        category_scan = scan_assets_fast(scan_path, category_rules)
+        while True:
+            scan_start = time.time()
+            try:
+                category, assets = next(category_scan)
+            except StopIteration:
+                scan_time += time.time() - scan_start
+                break
+            scan_time += time.time() - scan_start
+            record_profile_event("扫描 " + category, "scan", scan_start, {"assets": len(assets)})
+            
+            if not assets:
+                continue
+            
+            total_to_process += len(assets)
+            print("\n🚀 " + category + ": 扫描到 " + str(len(assets)) + " 个资产，开始移动...")
+            move_start = time.time()
+            
+            if use_batch_operations:
+                processed_count += batch_move_category(category, assets)
+            else:
+                processed_count += move_category_individually(category, assets)
+            
+            move_time += time.time() - move_start
+            record_profile_event("移动 " + category, "move", move_start, {"assets": len(assets)})
         
-        # 使用批量移动API
-        # @PROGRESS: 开始批量移动操作...
-        print("\n🚀 开始批量移动 " + str(total_to_process) + " 个资产...")
-        move_start = time.time()
+        if use_manifest:
+            save_organize_manifest()
         
-        if use_batch_operations:
-            processed_count = batch_move_all_assets(categorized_assets)
-        else:
-            processed_count = move_assets_individually(categorized_assets)
+        if total_to_process == 0 and processed_count == 0 and consolidated_count == 0:
+            print("没有需要整理的资产")
+            journal_finished = True
+            return
         
-        move_time = time.time() - move_start
+        print("\n✅ 扫描完成：" + str(total_to_process) + " 个资产，用时 " + str(scan_time) + "秒")
         print("✅ 移动完成：" + str(processed_count) + " 个资产，用时 " + str(move_time) + "秒")
-        print("📊 移动速度: " + str(processed_count / move_time) + " 个/秒")
+        if move_time > 0:
+            print("📊 移动速度: " + str(processed_count / move_time) + " 个/秒")
         
         # 批量保存
         # @PROGRESS: 保存更改中...
         print("\n💾 保存更改...")
         save_start = time.time()
-        batch_save_all()
+        saved_count, saved_bytes = batch_save_all()
         save_time = time.time() - save_start
-        print("✅ 保存完成，用时 " + str(save_time) + "秒")
+        record_profile_event("保存", "save", save_start, {"packages": saved_count, "bytes": saved_bytes})
+        journal_finished = True
+        print("✅ 保存完成：" + str(saved_count) + " 个包，写入 " + str(round(saved_bytes / 1024.0 / 1024.0, 2)) + " MB，用时 " + str(save_time) + "秒")
         
         # 清理重定向器
         # @PROGRESS: 清理重定向器中...
         print("\n🧹 清理重定向器...")
         cleanup_start = time.time()
-        redirector_count = cleanup_redirectors()
+        redirector_count = cleanup_redirectors(moved_source_folders)
         cleanup_time = time.time() - cleanup_start
+        record_profile_event("清理重定向器", "cleanup", cleanup_start, {"redirectors": redirector_count})
         
         total_time = time.time() - start_time
         
         print("\n🎉 === 批量整理完成 ===")
         print("✅ 处理资产: " + str(processed_count) + " 个")
+        if duplicates_file:
+            print("🔗 合并重复资产: " + str(consolidated_count) + " 个")
         print("🧹 清理重定向: " + str(redirector_count) + " 个")
         print("⚡ 总用时: " + str(total_time) + " 秒")
         print("📊 平均速度: " + str(processed_count / total_time) + " 个/秒")
@@ -124,13 +343,122 @@ def main():
         print("  保存: " + str(save_time) + "秒 (" + str(save_time/total_time*100) + "%)")
         print("  清理: " + str(cleanup_time) + "秒 (" + str(cleanup_time/total_time*100) + "%)")
         
+        if enable_profiling:
+            print_profile_report()
+            export_profile_trace()
+        
     except Exception as e:
         print("❌ 处理过程中出错: " + str(e))
     finally:
+        # 保存完成后删除日志，中途出错时保留，下次运行从日志恢复
+        close_move_journal(journal_finished)
+        
         # 恢复设置
         print("\n🔄 恢复实时操作设置...")
         restore_realtime_operations()
 
+def record_profile_event(name, category, start_time, args=None):
+    """记录一个从 start_time 到现在的追踪事件（Chrome 追踪的完整事件，时间单位微秒）"""
+    if not enable_profiling:
+        return
+    
+    profile_events.append({
+        "name": name,
+        "cat": category,
+        "ph": "X",
+        "ts": int((start_time - profile_start_time) * 1000000),
+        "dur": int((time.time() - start_time) * 1000000),
+        "pid": 1,
+        "tid": 1,
+        "args": args or {},
+    })
+
+def record_asset_timing(source_path, class_name, seconds):
+    """记录一个资产的移动耗时和所在批次（不在批次中移动时批次为 0）"""
+    if enable_profiling:
+        asset_timings.append((seconds, source_path, class_name, profile_batch_number))
+
+def get_asset_class_name(asset_path):
+    """从资产注册表读取资产的类名（不加载资产），未启用性能分析或查询失败时返回空字符串"""
+    if not enable_profiling:
+        return ""
+    try:
+        return str(unreal.EditorAssetLibrary.find_asset_data(asset_path).asset_class_path.asset_name)
+    except Exception:
+        return ""
+
+def get_percentile(sorted_values, percent):
+    """已排序列表的分位数（最近秩）"""
+    if not sorted_values:
+        return 0.0
+    rank = int(math.ceil(percent / 100.0 * len(sorted_values)))
+    return sorted_values[min(max(rank, 1), len(sorted_values)) - 1]
+
+def print_profile_report():
+    """输出批次耗时、按批大小分组的每资产耗时、资产耗时分位数、最慢资产和按类统计"""
+    print("\n⏱️  === 批次性能分析 ===")
+    
+    if batch_timings:
+        batch_seconds = sorted(timing["seconds"] for timing in batch_timings)
+        print("批次: " + str(len(batch_timings)) + " 批，每批 p50 " + str(round(get_percentile(batch_seconds, 50), 3))
+              + "秒，p95 " + str(round(get_percentile(batch_seconds, 95), 3)) + "秒，最大 " + str(round(batch_seconds[-1], 3)) + "秒")
+        
+        # 按批大小分组比较每个资产的平均耗时，判断批处理数量是否影响吞吐
+        print("按批大小统计（每资产平均毫秒）:")
+        for index, lower in enumerate(PROFILE_BATCH_SIZE_BUCKETS):
+            upper = PROFILE_BATCH_SIZE_BUCKETS[index + 1] if index + 1 < len(PROFILE_BATCH_SIZE_BUCKETS) else None
+            bucket = [timing for timing in batch_timings
+                      if timing["size"] >= lower and (upper is None or timing["size"] < upper)]
+            if not bucket:
+                continue
+            bucket_assets = sum(timing["size"] for timing in bucket)
+            bucket_seconds = sum(timing["seconds"] for timing in bucket)
+            label = str(lower) + "-" + str(upper - 1) if upper else str(lower) + "+"
+            print("  " + label + " 个/批: " + str(len(bucket)) + " 批，" + str(round(bucket_seconds / bucket_assets * 1000, 2)) + " 毫秒/资产")
+        
+        print("最慢批次:")
+        slowest_batches = sorted(enumerate(batch_timings, 1), key=lambda item: -item[1]["seconds"])[:PROFILE_TOP_COUNT]
+        for batch_number, timing in slowest_batches:
+            print("  批次 " + str(batch_number) + ("（逐个移动）" if timing.get("individual") else "") + ": "
+                  + str(timing["size"]) + " 个，" + str(round(timing["seconds"], 3)) + "秒，"
+                  + str(round(timing["seconds"] / max(timing["size"], 1) * 1000, 2)) + " 毫秒/资产")
+    
+    if not asset_timings:
+        print("没有资产移动耗时记录")
+        return
+    
+    asset_seconds = sorted(timing[0] for timing in asset_timings)
+    print("每资产移动耗时: p50 " + str(round(get_percentile(asset_seconds, 50) * 1000, 2)) + " 毫秒，p95 "
+          + str(round(get_percentile(asset_seconds, 95) * 1000, 2)) + " 毫秒，最大 " + str(round(asset_seconds[-1] * 1000, 2)) + " 毫秒")
+    
+    print("最慢资产:")
+    for seconds, source_path, class_name, batch_number in sorted(asset_timings, key=lambda timing: -timing[0])[:PROFILE_TOP_COUNT]:
+        print("  " + str(round(seconds * 1000, 2)) + " 毫秒  " + (class_name or "未知") + "  批次 " + str(batch_number) + "  " + source_path)
+    
+    class_seconds = {}
+    for seconds, _, class_name, _ in asset_timings:
+        class_seconds.setdefault(class_name or "未知", []).append(seconds)
+    print("按类统计:")
+    if any(not timing.get("individual") for timing in batch_timings):
+        # 整批一次 rename_assets，无法拆分出单个资产的重命名耗时
+        print("  注意: 批量提交的资产耗时 = 自身加载耗时 + 平摊的整批重命名耗时，只反映加载成本的差异，不能按类比较重命名成本")
+    for class_name, values in sorted(class_seconds.items(), key=lambda item: -sum(item[1]) / len(item[1])):
+        print("  " + class_name + ": " + str(len(values)) + " 个，平均 " + str(round(sum(values) / len(values) * 1000, 2))
+              + " 毫秒，最大 " + str(round(max(values) * 1000, 2)) + " 毫秒")
+
+def export_profile_trace():
+    """把追踪事件写成 Chrome 追踪JSON，可在 chrome://tracing 或 Perfetto 中打开"""
+    trace_path = profile_trace_file or os.path.splitext(get_manifest_path())[0] + ".trace.json"
+    try:
+        trace_folder = os.path.dirname(trace_path)
+        if trace_folder:
+            os.makedirs(trace_folder, exist_ok=True)
+        with open(trace_path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": profile_events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+        print("💾 性能追踪已写入: " + trace_path + "（" + str(len(profile_events)) + " 个事件）")
+    except Exception as e:
+        print("⚠️  写入性能追踪失败: " + str(e))
+
 def disable_realtime_operations():
     """禁用实时操作以提高性能"""
     console_commands = [
@@ -156,192 +484,1082 @@ def disable_realtime_operations():
     except Exception as e:
         print("⚠️  禁用实时操作失败: " + str(e))
 
-def scan_assets_fast(scan_path):
-    """快速扫描资产并按类型分类"""
-    categorized_assets = {
-        "Meshes": [],
-        "Materials": [],
-        "Textures": [],
-        "Blueprints": [],
-        "Animations": [],
-        "Audio": [],
-        "Other": []
+def load_category_rules(rules_path):
+    """
+    读取并编译分类规则，未指定文件时使用内置分类，失败返回 None
+    规则文件格式（JSON，安装了 PyYAML 时也可使用 YAML）:
+        {
+            "default_folder": "Other",
+            "class_rules": {"/Script/Engine.StaticMesh": "Meshes", "Texture2D": "Textures"},
+            "name_rules": [{"pattern": "^T_.*_N$", "folder": "Textures/Normals"}],
+            "tag_rules": [{"tag": "LODGroup", "value": "TEXTUREGROUP_UI", "folder": "Textures/UI"}]
+        }
+    匹配优先级：标签值规则 > 名称正则规则（按顺序） > 类规则 > default_folder，
+    default_folder 为 null 时不移动未匹配的资产
+    """
+    if not rules_path:
+        rule_data = {
+            "default_folder": OTHER_CATEGORY,
+            "class_rules": {
+                class_path: category
+                for category, class_paths in ASSET_CATEGORIES
+                for class_path in class_paths
+            },
+        }
+    else:
+        try:
+            with open(rules_path, "r", encoding="utf-8") as f:
+                if rules_path.lower().endswith((".yaml", ".yml")):
+                    try:
+                        import yaml
+                    except ImportError:
+                        print("❌ 读取YAML规则需要安装 PyYAML，或改用JSON规则文件")
+                        return None
+                    rule_data = yaml.safe_load(f) or {}
+                else:
+                    rule_data = json.load(f)
+        except Exception as e:
+            print("❌ 读取分类规则失败: " + str(e))
+            return None
+    
+    try:
+        rules = compile_category_rules(rule_data)
+    except Exception as e:
+        print("❌ 分类规则无效: " + str(e))
+        return None
+    
+    print("📋 分类规则: 类 " + str(len(rules["class_folders"])) + " 条，名称 " + str(len(rules["name_rules"]))
+          + " 条，标签 " + str(sum(len(values) for values in rules["tag_rules"].values())) + " 条")
+    return rules
+
+def compile_category_rules(rule_data):
+    """
+    把规则编译为按类路径索引的字典、预编译的名称正则列表和按标签名、标签值索引的字典，
+    每个资产的分类只需常数次字典查询，规则数量增加不会拖慢扫描
+    """
+    class_folders = {}
+    for class_path, folder in (rule_data.get("class_rules") or {}).items():
+        if "." not in class_path:
+            # 只写类名时按引擎模块处理
+            class_path = "/Script/Engine." + class_path
+        class_folders[class_path] = folder.strip("/")
+    
+    name_rules = []
+    for rule in rule_data.get("name_rules") or []:
+        name_rules.append((re.compile(rule["pattern"]), rule["folder"].strip("/")))
+    
+    tag_rules = {}
+    for rule in rule_data.get("tag_rules") or []:
+        tag_rules.setdefault(rule["tag"], {})[str(rule["value"])] = rule["folder"].strip("/")
+    
+    default_folder = rule_data.get("default_folder", OTHER_CATEGORY)
+    
+    # 产出顺序：按规则中首次出现的顺序，未匹配的最后
+    folder_order = []
+    for folder in list(class_folders.values()) + [folder for _, folder in name_rules] + [
+            folder for values in tag_rules.values() for folder in values.values()]:
+        if folder not in folder_order:
+            folder_order.append(folder)
+    if default_folder and default_folder.strip("/") not in folder_order:
+        folder_order.append(default_folder.strip("/"))
+    
+    return {
+        "class_folders": class_folders,
+        "name_rules": name_rules,
+        "tag_rules": tag_rules,
+        "default_folder": default_folder.strip("/") if default_folder else None,
+        "folder_order": folder_order,
     }
+
+def classify_asset(asset_data, rules):
+    """按规则返回资产的目标子文件夹，不移动时返回 None"""
+    for tag_name, folders_by_value in rules["tag_rules"].items():
+        tag_value = asset_data.get_tag_value(tag_name)
+        if tag_value is not None and str(tag_value) in folders_by_value:
+            return folders_by_value[str(tag_value)]
+    
+    if rules["name_rules"]:
+        asset_name = str(asset_data.asset_name)
+        for pattern, folder in rules["name_rules"]:
+            if pattern.search(asset_name):
+                return folder
     
-    # 获取所有资产
+    class_path = asset_data.asset_class_path
+    folder = rules["class_folders"].get(str(class_path.package_name) + "." + str(class_path.asset_name))
+    if folder:
+        return folder
+    return rules["default_folder"]
+
+def scan_assets_fast(scan_path, rules):
+    """
+    按类别扫描资产，逐个类别产出 (类别, [资产路径])
+    只有类规则时每个类别一次 ARFilter 查询（按类路径和递归路径过滤），移动可以在扫描完成前开始；
+    有名称或标签规则时一次查询全部资产，逐个按编译后的规则分类后再按类别产出
+    """
     asset_registry = unreal.AssetRegistryHelpers.get_asset_registry()
-    all_assets = asset_registry.get_assets_by_path(scan_path, recursive=True)
-    
-    for asset in all_assets:
-        # 获取资产路径
-        if hasattr(asset, 'get_full_name'):
-            asset_path = asset.get_full_name().split(' ')[1]
-        else:
-            asset_path = str(asset.package_name + '.' + asset.asset_name)
-            
-        if not asset_path.startswith('/Game/'):
+    redirector_class_path = make_class_path(REDIRECTOR_CLASS_PATH)
+    
+    if rules["name_rules"] or rules["tag_rules"]:
+        all_filter = unreal.ARFilter(
+            package_paths=[scan_path],
+            class_paths=[make_class_path("/Script/CoreUObject.Object")],
+            recursive_paths=True,
+            recursive_classes=True,
+            recursive_classes_exclusion_set=[redirector_class_path]
+        )
+        categorized_assets = {folder: [] for folder in rules["folder_order"]}
+        for asset_data in asset_registry.get_assets(all_filter):
+            package_name = str(asset_data.package_name)
+            if not package_name.startswith("/Game/"):
+                continue
+            folder = classify_asset(asset_data, rules)
+            if folder:
+                categorized_assets.setdefault(folder, []).append(package_name + "." + str(asset_data.asset_name))
+        
+        for folder, assets in categorized_assets.items():
+            yield folder, assets
+        return
+    
+    # 只有类规则：同一文件夹的类合并为一次查询
+    class_paths_by_folder = {}
+    for class_path, folder in rules["class_folders"].items():
+        class_paths_by_folder.setdefault(folder, []).append(make_class_path(class_path))
+    
+    for folder, class_paths in class_paths_by_folder.items():
+        asset_filter = unreal.ARFilter(
+            package_paths=[scan_path],
+            class_paths=class_paths,
+            recursive_paths=True
+        )
+        yield folder, get_filtered_asset_paths(asset_registry, asset_filter)
+    
+    if not rules["default_folder"]:
+        return
+    
+    # 其余类型：所有对象类只排除重定向器，已分类的类型在结果中按类路径精确剔除。
+    # 排除集合会连子类一起排除，而类别查询只匹配精确类，子类（如 WidgetBlueprint）必须留在这里
+    other_filter = unreal.ARFilter(
+        package_paths=[scan_path],
+        class_paths=[make_class_path("/Script/CoreUObject.Object")],
+        recursive_paths=True,
+        recursive_classes=True,
+        recursive_classes_exclusion_set=[redirector_class_path]
+    )
+    yield rules["default_folder"], get_filtered_asset_paths(asset_registry, other_filter, rules["class_folders"])
+
+def make_class_path(class_path):
+    """将 /Script/Module.Class 形式的类路径转换为 TopLevelAssetPath"""
+    package_name, class_name = class_path.split(".")
+    return unreal.TopLevelAssetPath(package_name, class_name)
+
+def get_filtered_asset_paths(asset_registry, asset_filter, excluded_class_paths=()):
+    """查询资产注册表，返回 /Game 下资产的对象路径，类路径在 excluded_class_paths 中的资产（精确匹配）跳过"""
+    asset_paths = []
+    for asset_data in asset_registry.get_assets(asset_filter):
+        package_name = str(asset_data.package_name)
+        class_path = asset_data.asset_class_path
+        if excluded_class_paths and str(class_path.package_name) + "." + str(class_path.asset_name) in excluded_class_paths:
             continue
-            
-        asset_class = str(asset.asset_class_path.asset_name)
-        
-        # 分类资产
-        if asset_class == "StaticMesh":
-            categorized_assets["Meshes"].append(asset_path)
-        elif asset_class in ["Material", "MaterialInstanceConstant"]:
-            categorized_assets["Materials"].append(asset_path)
-        elif asset_class in ["Texture2D", "TextureCube"]:
-            categorized_assets["Textures"].append(asset_path)
-        elif asset_class == "Blueprint":
-            categorized_assets["Blueprints"].append(asset_path)
-        elif asset_class in ["AnimSequence", "AnimBlueprint"]:
-            categorized_assets["Animations"].append(asset_path)
-        elif asset_class in ["SoundWave", "SoundCue"]:
-            categorized_assets["Audio"].append(asset_path)
-        else:
-            categorized_assets["Other"].append(asset_path)
-    
-    return categorized_assets
-
-def batch_move_all_assets(categorized_assets):
-    """批量移动所有资产"""
-    all_move_operations = []
-    
-    for category, assets in categorized_assets.items():
+        if package_name.startswith("/Game/"):
+            asset_paths.append(package_name + "." + str(asset_data.asset_name))
+    return asset_paths
+
+def batch_move_category(category, assets):
+    """批量移动一个类别的资产"""
+    move_operations = plan_category_moves(category, assets)
+    if not move_operations:
+        return 0
+    
+    # 确保目标文件夹存在
+    unreal.EditorAssetLibrary.make_directory(target_base_path + "/" + category)
+    
+    try:
+        # 使用批量移动API
+        processed_count = batch_move_assets(split_move_batches(move_operations))
+        return processed_count
+    except Exception as e:
+        print("⚠️  批量API失败，使用备用方法: " + str(e))
+        return move_category_individually(category, assets)
+
+def plan_category_moves(category, assets):
+    """
+    规划一个类别的移动，返回 [(源路径, 目标路径)]，只读取资产注册表和目标文件夹，不修改内容
+    """
+    move_operations = []
+    target_folder = target_base_path + "/" + category
+    
+    # 已整理的资产直接跳过，没有待移动资产时不再查询目标文件夹
+    pending_assets = filter_pending_assets(category, assets)
+    skipped_count = len(assets) - len(pending_assets)
+    if not pending_assets:
+        print("⏭️  " + category + " 全部已整理，跳过 " + str(skipped_count) + " 个")
+        return move_operations
+    
+    # 目标文件夹已有的资产名只查询一次，同名冲突在内存中分配后缀
+    taken_names = get_folder_asset_names(target_folder)
+    
+    for asset_path in pending_assets:
+        asset_name = allocate_asset_name(get_asset_name(asset_path), taken_names)
+        if asset_name is None:
+            skipped_count += 1
+            continue
+        
+        move_operations.append((asset_path, target_folder + "/" + asset_name))
+    
+    print("📋 准备执行 " + str(len(move_operations)) + " 个移动操作，跳过 " + str(skipped_count) + " 个")
+    return move_operations
+
+def split_move_batches(move_operations):
+    """按依赖关系或原顺序把移动操作分批"""
+    if use_dependency_batching:
+        return group_move_batches(move_operations)
+    return [move_operations[i:i + batch_size] for i in range(0, len(move_operations), batch_size)]
+
+def run_dry_run(category_rules):
+    """只扫描和规划，写出移动计划并输出汇总，不移动、保存资产，也不更新整理清单和移动日志"""
+    print("\n🔍 扫描并规划移动（只生成计划）...")
+    start_time = time.time()
+    
+    # 重复资产只列出将要执行的合并
+    consolidations = [
+        {"keeper": keeper_package, "duplicates": duplicate_packages}
+        for keeper_package, duplicate_packages in (load_duplicate_groups(duplicates_file) if duplicates_file else [])
+    ]
+    if consolidations:
+        print("🔗 将合并重复资产: " + str(len(consolidations)) + " 组，"
+              + str(sum(len(entry["duplicates"]) for entry in consolidations)) + " 个")
+    
+    moves = []
+    categories = {}
+    batch_count = 0
+    
+    for category, assets in scan_assets_fast(scan_path, category_rules):
         if not assets:
             continue
-            
-        folder_path = target_base_path + "/" + category
-        print("📂 准备移动 " + category + ": " + str(len(assets)) + " 个资产")
-        target_folder = target_base_path + "/" + category
         
-        # 确保目标文件夹存在
-        unreal.EditorAssetLibrary.make_directory(target_folder)
+        print("\n📝 " + category + ": 扫描到 " + str(len(assets)) + " 个资产")
+        move_operations = plan_category_moves(category, assets)
+        batches = split_move_batches(move_operations) if move_operations else []
         
-        for asset_path in assets:
-            # 从路径中提取资产名称
-            asset_name = asset_path.split('/')[-1]
-            target_path = target_folder + "/" + asset_name
-            
-            # 检查目标路径是否已存在
-            if unreal.EditorAssetLibrary.does_asset_exist(target_path):
-                if enable_rename:
-                    counter = 1
-                    while unreal.EditorAssetLibrary.does_asset_exist(target_path):
-                        new_path = target_folder + "/" + asset_name + "_" + str(counter).zfill(2)
-                        target_path = new_path
-                        counter += 1
-                else:
+        renamed_count = 0
+        for batch_index, batch in enumerate(batches):
+            for source_path, target_path in batch:
+                source_name = get_asset_name(source_path)
+                target_name = get_asset_name(target_path)
+                suffix = target_name[len(source_name):] if target_name != source_name else ""
+                if suffix:
+                    renamed_count += 1
+                moves.append({
+                    "source": source_path,
+                    "destination": target_path,
+                    "category": category,
+                    "suffix": suffix,
+                    "batch": batch_count + batch_index,
+                })
+        batch_count += len(batches)
+        
+        categories[category] = {
+            "scanned": len(assets),
+            "moves": len(move_operations),
+            "skipped": len(assets) - len(move_operations),
+            "renamed": renamed_count,
+        }
+    
+    plan_time = time.time() - start_time
+    summary = {
+        "scanned": sum(entry["scanned"] for entry in categories.values()),
+        "moves": len(moves),
+        "skipped": sum(entry["skipped"] for entry in categories.values()),
+        "renamed": sum(entry["renamed"] for entry in categories.values()),
+        "batches": batch_count,
+        "plan_time": round(plan_time, 3),
+        "categories": categories,
+    }
+    plan = {
+        "version": PLAN_VERSION,
+        "target_base_path": target_base_path,
+        "scan_path": scan_path,
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "summary": summary,
+        "moves": moves,
+        "consolidations": consolidations,
+    }
+    
+    print("\n📊 === 移动计划汇总 ===")
+    for category, entry in categories.items():
+        print("  " + category + ": 移动 " + str(entry["moves"]) + "，跳过 " + str(entry["skipped"]) + "，重命名 " + str(entry["renamed"]))
+    print("✅ 扫描 " + str(summary["scanned"]) + " 个，计划移动 " + str(summary["moves"]) + " 个（" + str(batch_count)
+          + " 批），跳过 " + str(summary["skipped"]) + " 个，重命名 " + str(summary["renamed"]) + " 个，用时 " + str(plan_time) + "秒")
+    
+    output_path = plan_file or os.path.splitext(get_manifest_path())[0] + ".plan.json"
+    try:
+        output_folder = os.path.dirname(output_path)
+        if output_folder:
+            os.makedirs(output_folder, exist_ok=True)
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(plan, f, ensure_ascii=False, indent=1)
+        print("💾 移动计划已写入: " + output_path)
+    except Exception as e:
+        print("❌ 写入移动计划失败: " + str(e))
+    
+    if compare_plan_file:
+        diff_move_plans(load_move_plan(compare_plan_file), plan)
+    return plan
+
+def load_move_plan(plan_path):
+    """读取移动计划文件，失败时返回 None"""
+    try:
+        with open(plan_path, "r", encoding="utf-8") as f:
+            plan = json.load(f)
+        if plan.get("version") != PLAN_VERSION:
+            print("⚠️  移动计划版本不符: " + plan_path)
+            return None
+        return plan
+    except Exception as e:
+        print("❌ 读取移动计划失败: " + str(e))
+        return None
+
+def diff_move_plans(old_plan, new_plan):
+    """
+    按源路径对比两个移动计划，输出并返回新增、移除和目标变化的移动
+    返回 {"added": [...], "removed": [...], "changed": [(旧条目, 新条目)]}
+    """
+    if old_plan is None or new_plan is None:
+        return None
+    
+    old_moves = {entry["source"]: entry for entry in old_plan.get("moves", [])}
+    new_moves = {entry["source"]: entry for entry in new_plan.get("moves", [])}
+    
+    added = [entry for source, entry in new_moves.items() if source not in old_moves]
+    removed = [entry for source, entry in old_moves.items() if source not in new_moves]
+    changed = [
+        (old_moves[source], entry) for source, entry in new_moves.items()
+        if source in old_moves and old_moves[source]["destination"] != entry["destination"]
+    ]
+    
+    print("\n🔀 === 移动计划对比 ===")
+    print("旧计划: " + str(len(old_moves)) + " 个移动（" + str(old_plan.get("created", "")) + "）")
+    print("新计划: " + str(len(new_moves)) + " 个移动（" + str(new_plan.get("created", "")) + "）")
+    print("新增 " + str(len(added)) + " 个，移除 " + str(len(removed)) + " 个，目标变化 " + str(len(changed)) + " 个，不变 "
+          + str(len(new_moves) - len(added) - len(changed)) + " 个")
+    
+    for entry in added[:PLAN_DIFF_PRINT_LIMIT]:
+        print("  + " + entry["source"] + " -> " + entry["destination"])
+    for entry in removed[:PLAN_DIFF_PRINT_LIMIT]:
+        print("  - " + entry["source"] + " -> " + entry["destination"])
+    for old_entry, new_entry in changed[:PLAN_DIFF_PRINT_LIMIT]:
+        print("  ~ " + new_entry["source"] + ": " + old_entry["destination"] + " -> " + new_entry["destination"])
+    if max(len(added), len(removed), len(changed)) > PLAN_DIFF_PRINT_LIMIT:
+        print("  ...（每类最多显示 " + str(PLAN_DIFF_PRINT_LIMIT) + " 条）")
+    
+    old_time = old_plan.get("summary", {}).get("plan_time")
+    new_time = new_plan.get("summary", {}).get("plan_time")
+    if old_time is not None and new_time is not None:
+        print("规划用时: " + str(old_time) + "秒 -> " + str(new_time) + "秒")
+    
+    return {"added": added, "removed": removed, "changed": changed}
+
+def filter_pending_assets(category, assets):
+    """
+    过滤出需要移动的资产：已在本类别文件夹（含子文件夹）中的资产，
+    以及整理清单中记录为已整理的资产都会被跳过
+    """
+    category_folder = target_base_path + "/" + category
+    pending_assets = []
+    
+    for asset_path in assets:
+        package_name = asset_path.split(".")[0]
+        if package_name.startswith(category_folder + "/"):
+            record_organized_asset(package_name, package_name, category)
+            continue
+        if package_name in organize_manifest:
+            seen_packages.add(package_name)
+            continue
+        pending_assets.append(asset_path)
+    
+    return pending_assets
+
+def record_organized_asset(source_path, target_path, category=None):
+    """记录移动成功或已在分类文件夹中的资产"""
+    source_package = source_path.split(".")[0]
+    target_package = target_path.split(".")[0]
+    if category is None:
+        category = get_asset_folder(target_package)[len(target_base_path) + 1:]
+    
+    if source_package != target_package:
+        moved_source_folders.add(get_asset_folder(source_package))
+        moved_packages.add(source_package)
+        moved_packages.add(target_package)
+        checkpoint_packages.add(source_package)
+        checkpoint_packages.add(target_package)
+    
+    previous = organize_manifest.get(target_package, {})
+    organize_manifest[target_package] = {
+        "source": previous.get("source", source_package),
+        "category": category,
+    }
+    seen_packages.add(target_package)
+
+def get_manifest_path():
+    """整理清单路径：项目 Saved/AssetOrganizer 目录下，按目标路径命名"""
+    file_name = target_base_path.strip("/").replace("/", "_") + ".json"
+    return os.path.join(unreal.Paths.project_saved_dir(), "AssetOrganizer", file_name)
+
+def load_organize_manifest():
+    """读取当前目标路径的整理清单，不存在或格式不符时返回空字典"""
+    manifest_path = get_manifest_path()
+    if not os.path.isfile(manifest_path):
+        return {}
+    
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != MANIFEST_VERSION or manifest.get("target_base_path") != target_base_path:
+            print("⚠️  整理清单版本或目标路径不符，忽略")
+            return {}
+        return manifest.get("assets", {})
+    except Exception as e:
+        print("⚠️  读取整理清单失败: " + str(e))
+        return {}
+
+def save_organize_manifest():
+    """保存整理清单，扫描路径下本次没有扫描到的记录（资产已删除或移走）会被移除"""
+    scan_prefix = scan_path.rstrip("/") + "/"
+    assets = {
+        package_name: entry for package_name, entry in organize_manifest.items()
+        if package_name in seen_packages or not package_name.startswith(scan_prefix)
+    }
+    
+    manifest_path = get_manifest_path()
+    try:
+        os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": MANIFEST_VERSION,
+                "target_base_path": target_base_path,
+                "updated": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "assets": assets,
+            }, f, ensure_ascii=False, indent=1)
+        print("💾 整理清单已保存: " + str(len(assets)) + " 条记录")
+    except Exception as e:
+        print("⚠️  保存整理清单失败: " + str(e))
+
+def load_duplicate_groups(report_path):
+    """读取重复资产报告中的分组 [(保留的包, [重复的包])]，失败时返回空列表"""
+    try:
+        with open(report_path, "r", encoding="utf-8") as f:
+            report = json.load(f)
+        return [(group["keeper"], group["duplicates"]) for group in report.get("groups", []) if group.get("duplicates")]
+    except Exception as e:
+        print("⚠️  读取重复资产报告失败: " + str(e))
+        return []
+
+def consolidate_duplicate_assets(report_path):
+    """
+    按重复资产报告把每组重复资产合并到保留的资产：引用改为指向保留的资产，重复资产变为重定向器，
+    重定向器所在文件夹计入本次清理，涉及的包和引用者计入本次保存，返回合并的资产数量
+    只合并与保留的资产同类、且资产注册表中的依赖完全相同的资产，报告生成后被改动的资产不会被误合并
+    """
+    groups = load_duplicate_groups(report_path)
+    if not groups:
+        return 0
+    
+    asset_registry = unreal.AssetRegistryHelpers.get_asset_registry()
+    dependency_options = unreal.AssetRegistryDependencyOptions(
+        include_soft_package_references=True,
+        include_hard_package_references=True,
+        include_searchable_names=False,
+        include_soft_management_references=False,
+        include_hard_management_references=False
+    )
+    
+    def get_package_dependencies(package_name):
+        return set(str(name) for name in asset_registry.get_dependencies(package_name, dependency_options) or [])
+    
+    print("\n🔗 合并重复资产: " + str(len(groups)) + " 组，" + str(sum(len(duplicates) for _, duplicates in groups)) + " 个")
+    consolidated_count = 0
+    for keeper_package, duplicate_packages in groups:
+        keeper = unreal.EditorAssetLibrary.load_asset(keeper_package)
+        if not keeper:
+            print("⚠️  无法加载保留的资产，跳过本组: " + keeper_package)
+            continue
+        
+        keeper_dependencies = get_package_dependencies(keeper_package)
+        duplicates = []
+        for package_name in duplicate_packages:
+            asset = unreal.EditorAssetLibrary.load_asset(package_name)
+            # 只合并同类资产，报告生成后被改动或删除的资产跳过
+            if not asset or asset.get_class() != keeper.get_class():
+                print("⚠️  跳过无法合并的资产: " + package_name)
+                continue
+            # 引用的资产不同（例如父材质或材质不同）说明内容不同，不能合并
+            if get_package_dependencies(package_name) != keeper_dependencies:
+                print("⚠️  依赖与保留的资产不同，跳过: " + package_name)
+                continue
+            duplicates.append((package_name, asset))
+        if not duplicates:
+            continue
+        
+        try:
+            if not unreal.EditorAssetLibrary.consolidate_assets(keeper, [asset for _, asset in duplicates]):
+                print("⚠️  合并失败: " + keeper_package)
+                continue
+        except Exception as e:
+            print("⚠️  合并失败: " + keeper_package + " 错误: " + str(e))
+            continue
+        
+        moved_packages.add(keeper_package)
+        for package_name, _ in duplicates:
+            moved_source_folders.add(get_asset_folder(package_name))
+            moved_packages.add(package_name)
+        consolidated_count += len(duplicates)
+    
+    print("✅ 合并完成: " + str(consolidated_count) + " 个")
+    return consolidated_count
+
+def get_journal_path():
+    """移动日志路径：与整理清单同目录，JSON Lines 格式"""
+    return os.path.splitext(get_manifest_path())[0] + ".journal.jsonl"
+
+def read_move_journal():
+    """
+    读取上次运行留下的移动日志，没有日志时返回 None
+    返回 ({批次号: [(源路径, 目标路径)]}（按计划顺序）, 已保存的批次号集合)，
+    完成记录只用于输出进度（完成但未保存的移动会随崩溃丢失），崩溃时只写了一半的最后一行会被忽略
+    """
+    journal_path = get_journal_path()
+    if not os.path.isfile(journal_path):
+        return None
+    
+    planned_batches = {}
+    completed_batches = set()
+    saved_batches = set()
+    try:
+        with open(journal_path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
                     continue
-            
-            all_move_operations.append((asset_path, target_path))
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    print("⚠️  移动日志第 " + str(line_number) + " 行不完整，忽略之后的内容")
+                    break
+                
+                if record.get("op") == "start" and record.get("target_base_path") != target_base_path:
+                    print("⚠️  移动日志的目标路径不符，忽略")
+                    return None
+                if record.get("op") == "plan":
+                    planned_batches[record["batch"]] = [tuple(move) for move in record["moves"]]
+                elif record.get("op") == "done":
+                    completed_batches.add(record["batch"])
+                elif record.get("op") == "saved":
+                    saved_batches.update(record["batches"])
+    except Exception as e:
+        print("⚠️  读取移动日志失败: " + str(e))
+        return None
     
-    print("📋 准备执行 " + str(len(all_move_operations)) + " 个移动操作")
+    if not planned_batches:
+        return None
+    
+    saved_batches &= set(planned_batches)
+    print("📒 发现未完成的移动日志: " + str(len(planned_batches)) + " 批，已完成 "
+          + str(len(completed_batches & set(planned_batches))) + " 批，已保存 " + str(len(saved_batches)) + " 批")
+    return planned_batches, saved_batches
+
+def open_move_journal(unfinished_journal):
+    """打开移动日志，恢复时在原日志后追加，批次号接着上次继续"""
+    global move_journal, next_journal_batch_id
+    
+    journal_path = get_journal_path()
+    resume = unfinished_journal is not None
+    next_journal_batch_id = max(unfinished_journal[0]) + 1 if resume else 0
     
     try:
-        # 使用批量移动API
-        processed_count = batch_move_assets(all_move_operations)
-        return processed_count
+        os.makedirs(os.path.dirname(journal_path), exist_ok=True)
+        move_journal = open(journal_path, "a" if resume else "w", encoding="utf-8")
+        write_journal_records([{
+            "op": "start",
+            "target_base_path": target_base_path,
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }])
     except Exception as e:
-        print("⚠️  批量API失败，使用备用方法: " + str(e))
-        return move_assets_individually(categorized_assets)
+        print("⚠️  打开移动日志失败，本次不记录日志: " + str(e))
+        move_journal = None
+
+def write_journal_records(records):
+    """追加日志记录并立即落盘，崩溃时已写入的记录不会丢失"""
+    if move_journal is None:
+        return
+    
+    for record in records:
+        move_journal.write(json.dumps(record, ensure_ascii=False) + "\n")
+    move_journal.flush()
+    os.fsync(move_journal.fileno())
+
+def journal_plan_batches(batches):
+    """提交前一次写入一个类别所有批次的移动计划，返回分配的批次号"""
+    global next_journal_batch_id
+    
+    batch_ids = list(range(next_journal_batch_id, next_journal_batch_id + len(batches)))
+    next_journal_batch_id += len(batches)
+    write_journal_records([
+        {"op": "plan", "batch": batch_id, "moves": [list(move) for move in batch]}
+        for batch_id, batch in zip(batch_ids, batches)
+    ])
+    return batch_ids
+
+def finish_journal_batch(batch_id, success_count):
+    """写入批次完成记录，完成的批次累计到检查点间隔时保存一次"""
+    if move_journal is None:
+        return
+    
+    write_journal_records([{"op": "done", "batch": batch_id, "success": success_count}])
+    checkpoint_batch_ids.append(batch_id)
+    if len(checkpoint_batch_ids) >= checkpoint_interval:
+        save_checkpoint()
+
+def save_checkpoint():
+    """
+    保存上次检查点之后的批次涉及的包，全部保存成功后写入已保存记录，
+    崩溃后恢复时跳过这些批次；保存失败时不写记录，恢复时照常核对
+    """
+    if not checkpoint_batch_ids:
+        return
+    
+    checkpoint_start = time.time()
+    saved_count, _, succeeded = save_moved_packages(checkpoint_packages)
+    if succeeded:
+        write_journal_records([{"op": "saved", "batches": list(checkpoint_batch_ids)}])
+    print("  💾 检查点: " + str(len(checkpoint_batch_ids)) + " 批，保存 " + str(saved_count) + " 个包，用时 "
+          + str(round(time.time() - checkpoint_start, 2)) + "秒" + ("" if succeeded else "（保存失败，恢复时需要核对）"))
+    record_profile_event("检查点", "save", checkpoint_start, {"batches": len(checkpoint_batch_ids), "packages": saved_count})
+    
+    checkpoint_batch_ids.clear()
+    checkpoint_packages.clear()
+
+def close_move_journal(finished):
+    """关闭移动日志，整理和保存都已完成时删除日志文件"""
+    global move_journal
+    
+    if move_journal is None:
+        return
+    
+    move_journal.close()
+    move_journal = None
+    if finished:
+        try:
+            os.remove(get_journal_path())
+        except OSError as e:
+            print("⚠️  删除移动日志失败: " + str(e))
+
+def resume_move_journal(planned_batches, saved_batches):
+    """
+    从上次未完成的移动日志恢复，返回恢复和补完的资产数量
+    检查点已保存的批次直接跳过，只记录源文件夹用于清理重定向器；
+    其余批次逐个核对，目标已存在的记为已完成，源资产仍在的按原批次重新提交
+    （完成但未保存的移动会随编辑器崩溃丢失，所以只有已保存记录才能跳过核对）
+    """
+    restored_count = 0
+    saved_count = 0
+    missing_count = 0
+    pending_batches = []
+    pending_batch_ids = []
+    
+    for batch_id, moves in planned_batches.items():
+        if batch_id in saved_batches:
+            for source_path, _ in moves:
+                moved_source_folders.add(get_asset_folder(source_path.split(".")[0]))
+            saved_count += len(moves)
+            continue
+        
+        pending_moves = []
+        for source_path, target_path in moves:
+            if unreal.EditorAssetLibrary.does_asset_exist(target_path):
+                record_organized_asset(source_path, target_path)
+                restored_count += 1
+            elif unreal.EditorAssetLibrary.does_asset_exist(source_path):
+                pending_moves.append((source_path, target_path))
+            else:
+                missing_count += 1
+        
+        if pending_moves:
+            pending_batches.append(pending_moves)
+            pending_batch_ids.append(batch_id)
+    
+    print("📒 从日志恢复: 已保存 " + str(saved_count) + " 个（跳过核对），已完成 " + str(restored_count) + " 个，待补完 "
+          + str(sum(len(batch) for batch in pending_batches)) + " 个（" + str(len(pending_batches))
+          + " 批），源和目标都不存在 " + str(missing_count) + " 个")
+    restored_count += saved_count
+    if not pending_batches:
+        return restored_count
+    
+    for target_folder in set(get_asset_folder(target_path) for batch in pending_batches for _, target_path in batch):
+        unreal.EditorAssetLibrary.make_directory(target_folder)
+    
+    return restored_count + batch_move_assets(pending_batches, pending_batch_ids)
+
+def get_asset_name(asset_path):
+    """从 /Game/Folder/Name.Name 形式的路径中取出资产名"""
+    return asset_path.split('/')[-1].split('.')[0]
+
+def get_asset_folder(asset_path):
+    """资产所在文件夹路径"""
+    return asset_path.rsplit('/', 1)[0]
+
+def get_folder_asset_names(folder_path):
+    """读取文件夹中已有的资产名（小写，资产名不区分大小写）"""
+    taken_names = set()
+    try:
+        for asset_path in unreal.EditorAssetLibrary.list_assets(folder_path, recursive=False):
+            taken_names.add(get_asset_name(asset_path).lower())
+    except Exception as e:
+        print("⚠️  读取文件夹资产失败: " + folder_path + " 错误: " + str(e))
+    return taken_names
+
+def allocate_asset_name(asset_name, taken_names):
+    """
+    在内存中为资产分配不冲突的名称，并记为已占用，本次运行中先分配的名称同样视为已占用
+    名称冲突且未开启自动重命名时返回 None
+    """
+    new_name = asset_name
+    if new_name.lower() in taken_names:
+        if not enable_rename:
+            return None
+        
+        counter = 1
+        while new_name.lower() in taken_names:
+            new_name = asset_name + "_" + str(counter).zfill(2)
+            counter += 1
+    
+    taken_names.add(new_name.lower())
+    return new_name
 
-def batch_move_assets(move_operations):
-    """批量移动资产"""
+def group_move_batches(move_operations):
+    """
+    按引用关系把移动操作分批：共享引用者或互相引用的资产归入同一组（并查集），
+    再把整组装入批次，使每个引用者包尽量只在一个批次中被修复引用；
+    超过批处理数量的组按引用者排序后拆分，引用者相同的资产仍相邻
+    输出与按原顺序分批相比被标脏的包数，查询失败时退回按原顺序分批
+    """
+    in_order_batches = [move_operations[i:i + batch_size] for i in range(0, len(move_operations), batch_size)]
+    
+    try:
+        asset_registry = unreal.AssetRegistryHelpers.get_asset_registry()
+        dependency_options = unreal.AssetRegistryDependencyOptions(
+            include_soft_package_references=True,
+            include_hard_package_references=True,
+            include_searchable_names=False,
+            include_soft_management_references=False,
+            include_hard_management_references=False
+        )
+        
+        moving_packages = [source_path.split(".")[0] for source_path, _ in move_operations]
+        moving_set = set(moving_packages)
+        parent = {}
+        
+        def find(package_name):
+            root = parent.setdefault(package_name, package_name)
+            while root != parent[root]:
+                root = parent[root]
+            while package_name != root:
+                parent[package_name], package_name = root, parent[package_name]
+            return root
+        
+        def union(first, second):
+            parent[find(first)] = find(second)
+        
+        # 每个移动的包会让自己和所有引用者被标脏
+        dirty_packages = {}
+        for package_name in moving_packages:
+            referencers = set(str(name) for name in asset_registry.get_referencers(package_name, dependency_options) or [])
+            dirty_packages[package_name] = referencers | {package_name}
+            for referencer in referencers:
+                union(package_name, referencer)
+            
+            # 依赖的资产也在移动时，两者必须放在同一组
+            for dependency in asset_registry.get_dependencies(package_name, dependency_options) or []:
+                if str(dependency) in moving_set:
+                    union(package_name, str(dependency))
+    except Exception as e:
+        print("⚠️  读取引用关系失败，按原顺序分批: " + str(e))
+        return in_order_batches
+    
+    # 按首次出现的顺序收集分组
+    groups = {}
+    for operation, package_name in zip(move_operations, moving_packages):
+        groups.setdefault(find(package_name), []).append(operation)
+    
+    # 整组装入批次，超过批处理数量的组拆分为多个整批
+    batches = []
+    current_batch = []
+    for group in groups.values():
+        if len(group) > batch_size:
+            group.sort(key=lambda operation: sorted(dirty_packages[operation[0].split(".")[0]]))
+            batches.extend(group[i:i + batch_size] for i in range(0, len(group), batch_size))
+            continue
+        if current_batch and len(current_batch) + len(group) > batch_size:
+            batches.append(current_batch)
+            current_batch = []
+        current_batch.extend(group)
+    if current_batch:
+        batches.append(current_batch)
+    
+    def count_dirty(batch_list):
+        total = 0
+        for batch in batch_list:
+            touched = set()
+            for source_path, _ in batch:
+                touched |= dirty_packages[source_path.split(".")[0]]
+            total += len(touched)
+        return total
+    
+    print("🧩 依赖分组: " + str(len(groups)) + " 组，" + str(len(batches)) + " 批；包标脏次数 原顺序 "
+          + str(count_dirty(in_order_batches)) + " → 分组后 " + str(count_dirty(batches)))
+    return batches
+
+def batch_move_assets(batches, batch_ids=None):
+    """
+    批量移动资产，每批通过一次 AssetTools.rename_assets 提交
+    提交前把所有批次的计划写入移动日志，每批完成后写入完成记录
+    """
+    if batch_ids is None:
+        batch_ids = journal_plan_batches(batches)
+    
+    global profile_batch_number
+    
     processed_count = 0
+    total_operations = sum(len(batch) for batch in batches)
+    finished_operations = 0
     
     # 分批处理
-    for i in range(0, len(move_operations), batch_size):
-        current_batch = move_operations[i:i + batch_size]
-        print("🔄 执行批次 " + str(i//batch_size + 1) + "/" + str((len(move_operations)-1)//batch_size + 1) + ": " + str(len(current_batch)) + " 个操作")
+    for batch_index, current_batch in enumerate(batches):
+        print("🔄 执行批次 " + str(batch_index + 1) + "/" + str(len(batches)) + ": " + str(len(current_batch)) + " 个操作")
+        batch_start = time.time()
+        profile_batch_number = len(batch_timings) + 1
         
-        # 批量重命名
+        # 整批一次提交，批内共享引用修复和重定向器创建
+        individual = False
         try:
-            batch_rename_assets(current_batch)
+            success_count = batch_rename_assets(current_batch)
         except Exception as e:
-            print("⚠️  批量重命名失败: " + str(e))
+            print("⚠️  批量重命名失败，逐个移动本批次: " + str(e))
+            success_count = move_batch_individually(current_batch)
+            individual = True
         
-        # 逐个移动
-        success_count = 0
-        for j, (source_path, target_path) in enumerate(current_batch):
-            try:
-                if unreal.EditorAssetLibrary.does_asset_exist(source_path):
-                    unreal.EditorAssetLibrary.rename_asset(source_path, target_path)
-                    success_count += 1
-                    processed_count += 1
-                
-                if j % 10 == 0:  # 每10个显示一次进度
-                    print("  进度: " + str(i + j + 1) + "/" + str(len(move_operations)) + " (" + str(success_count) + " 成功)")
-            except Exception as e:
-                print("移动失败: " + source_path + " -> " + target_path + " 错误: " + str(e))
+        processed_count += success_count
+        batch_time = max(time.time() - batch_start, 0.001)
+        if enable_profiling:
+            batch_timings.append({"size": len(current_batch), "success": success_count, "seconds": batch_time,
+                                  "individual": individual})
+            record_profile_event("批次 " + str(profile_batch_number), "batch", batch_start,
+                                 {"size": len(current_batch), "success": success_count})
+        print("  ✅ 批次完成: " + str(success_count) + "/" + str(len(current_batch)) + " 个，用时 " + str(round(batch_time, 2)) + "秒，" + str(round(success_count / batch_time, 1)) + " 个/秒")
+        finished_operations += len(current_batch)
+        print("  进度: " + str(finished_operations) + "/" + str(total_operations) + " (" + str(processed_count) + " 成功)")
+        
+        # 检查点保存不计入批次耗时
+        finish_journal_batch(batch_ids[batch_index], success_count)
     
+    profile_batch_number = 0
     return processed_count
 
 def batch_rename_assets(move_operations):
-    """批量重命名资产"""
-    # 这里可以添加批量重命名逻辑
-    pass
+    """
+    通过一次 AssetTools.rename_assets 调用移动一批资产，返回提交的资产数量
+    rename_assets 返回失败时抛出异常，由调用方逐个重试
+    """
+    rename_data = []
+    submitted_operations = []
+    load_timings = []
+    for source_path, target_path in move_operations:
+        load_start = time.time()
+        asset = unreal.EditorAssetLibrary.load_asset(source_path)
+        if not asset:
+            print("⚠️  无法加载资产，跳过: " + source_path)
+            continue
+        if enable_profiling:
+            load_timings.append((time.time() - load_start, asset.get_class().get_name()))
+        
+        package_path, asset_name = target_path.rsplit("/", 1)
+        rename_data.append(unreal.AssetRenameData(
+            asset=asset,
+            new_package_path=package_path,
+            new_name=asset_name.split(".")[0]
+        ))
+        submitted_operations.append((source_path, target_path))
+    
+    if not rename_data:
+        return 0
+    
+    asset_tools = unreal.AssetToolsHelpers.get_asset_tools()
+    rename_start = time.time()
+    renamed = asset_tools.rename_assets(rename_data)
+    record_profile_event("rename_assets", "rename", rename_start, {"assets": len(rename_data)})
+    if not renamed:
+        raise RuntimeError("rename_assets 返回失败")
+    
+    # 整批一次提交，每个资产的耗时 = 自身加载耗时 + 平摊的批量重命名耗时
+    if enable_profiling:
+        rename_share = (time.time() - rename_start) / len(rename_data)
+        for (source_path, _), (load_time, class_name) in zip(submitted_operations, load_timings):
+            record_asset_timing(source_path, class_name, load_time + rename_share)
+    
+    for source_path, target_path in submitted_operations:
+        record_organized_asset(source_path, target_path)
+    return len(rename_data)
 
-def move_assets_individually(categorized_assets):
-    """逐个移动资产（备用方法）"""
-    processed_count = 0
+def move_batch_individually(move_operations):
+    """逐个移动一批资产，跳过批量提交时已经移动成功的资产"""
+    success_count = 0
     
-    for category, assets in categorized_assets.items():
-        if not assets:
-            continue
+    for source_path, target_path in move_operations:
+        try:
+            # 目标在规划时不存在，现在存在说明批量提交时已移动成功
+            if unreal.EditorAssetLibrary.does_asset_exist(target_path):
+                success_count += 1
+                record_organized_asset(source_path, target_path)
+                continue
             
-        target_folder = target_base_path + "/" + category
-        unreal.EditorAssetLibrary.make_directory(target_folder)
+            class_name = get_asset_class_name(source_path)
+            move_start = time.time()
+            if unreal.EditorAssetLibrary.rename_asset(source_path, target_path):
+                record_asset_timing(source_path, class_name, time.time() - move_start)
+                record_profile_event(get_asset_name(source_path), "asset", move_start, {"class": class_name})
+                success_count += 1
+                record_organized_asset(source_path, target_path)
+        except Exception as e:
+            print("移动失败: " + source_path + " -> " + target_path + " 错误: " + str(e))
+    
+    return success_count
+
+def move_category_individually(category, assets):
+    """
+    逐个移动一个类别的资产（备用方法）
+    与批量移动一样按批处理数量分批写入移动日志，每批逐个移动完成后写入完成记录
+    """
+    move_operations = plan_category_moves(category, assets)
+    if not move_operations:
+        return 0
+    
+    unreal.EditorAssetLibrary.make_directory(target_base_path + "/" + category)
+    batches = [move_operations[i:i + batch_size] for i in range(0, len(move_operations), batch_size)]
+    
+    global profile_batch_number
+    
+    processed_count = 0
+    for batch_id, batch in zip(journal_plan_batches(batches), batches):
+        batch_start = time.time()
+        profile_batch_number = len(batch_timings) + 1
+        success_count = move_batch_individually(batch)
+        processed_count += success_count
         
-        for asset_path in assets:
-            try:
-                # 从路径中提取资产名称
-                asset_name = asset_path.split('/')[-1]
-                target_path = target_folder + "/" + asset_name
-                
-                if not unreal.EditorAssetLibrary.does_asset_exist(target_path):
-                    unreal.EditorAssetLibrary.rename_asset(asset_path, target_path)
-                    processed_count += 1
-            except Exception as e:
-                print("移动失败: " + asset_path + " 错误: " + str(e))
+        batch_time = max(time.time() - batch_start, 0.001)
+        if enable_profiling:
+            batch_timings.append({"size": len(batch), "success": success_count, "seconds": batch_time, "individual": True})
+            record_profile_event("逐个移动批次 " + str(profile_batch_number), "batch", batch_start,
+                                 {"size": len(batch), "success": success_count})
+        finish_journal_batch(batch_id, success_count)
     
+    profile_batch_number = 0
     return processed_count
 
 def batch_save_all():
-    """批量保存所有更改"""
+    """
+    只保存本次整理标脏的包：移动后的资产、源位置的重定向器以及引用它们的包，
+    一次批量保存，返回 (保存的包数, 写入的字节数)
+    """
+    if not moved_packages:
+        print("✅ 没有资产被移动，无需保存")
+        return 0, 0
+    
+    saved_count, saved_bytes, _ = save_moved_packages(moved_packages)
+    if saved_count == 0:
+        print("✅ 没有需要保存的包（检查点已保存的包不再重复保存）")
+    return saved_count, saved_bytes
+
+def save_moved_packages(package_names):
+    """
+    保存移动涉及的包及其引用者中有未保存修改的包，
+    返回 (保存的包数, 写入的字节数, 是否全部保存成功)
+    """
     try:
-        # 保存所有资产
-        unreal.EditorAssetLibrary.save_loaded_assets()
-        # 保存地图
-        unreal.EditorLevelLibrary.save_current_level()
+        # 移动后注册表中的引用已指向新路径，按新包名查询引用者
+        candidate_packages = set(package_names)
+        asset_registry = unreal.AssetRegistryHelpers.get_asset_registry()
+        for package_name in package_names:
+            for referencer in asset_registry.get_referencers(package_name, unreal.AssetRegistryDependencyOptions()) or []:
+                candidate_packages.add(str(referencer))
+        
+        dirty_packages = (list(unreal.EditorLoadingAndSavingUtils.get_dirty_content_packages())
+                          + list(unreal.EditorLoadingAndSavingUtils.get_dirty_map_packages()))
+        packages_to_save = [package for package in dirty_packages if package.get_name() in candidate_packages]
+        
+        if not packages_to_save:
+            return 0, 0, True
+        
+        print("💾 批量保存 " + str(len(packages_to_save)) + " 个包（候选 " + str(len(candidate_packages)) + " 个）")
+        succeeded = unreal.EditorLoadingAndSavingUtils.save_packages(packages_to_save, True)
+        if not succeeded:
+            print("⚠️  部分包保存失败")
+        
+        saved_bytes = sum(get_package_file_size(package.get_name()) for package in packages_to_save)
+        return len(packages_to_save), saved_bytes, bool(succeeded)
     except Exception as e:
-        print("⚠️  批量保存失败，尝试备用方法: " + str(e))
+        print("⚠️  批量保存失败: " + str(e))
+        return 0, 0, False
+
+def get_package_file_size(package_name):
+    """包在磁盘上所有文件（包括 .uexp/.ubulk 等）的大小之和，找不到时返回0"""
+    if not package_name.startswith("/Game/"):
+        return 0
+    
+    file_base = os.path.join(unreal.Paths.project_content_dir(), package_name[len("/Game/"):])
+    total_size = 0
+    for extension in PACKAGE_FILE_EXTENSIONS:
         try:
-            # 备用保存方法
-            unreal.EditorAssetLibrary.save_directory("/Game")
-        except Exception as e2:
-            print("⚠️  备用保存也失败: " + str(e2))
+            total_size += os.path.getsize(file_base + extension)
+        except OSError:
+            continue
+    return total_size
 
-def cleanup_redirectors():
-    """清理重定向器"""
+def cleanup_redirectors(folders):
+    """
+    清理重定向器：只在本次移动涉及的源文件夹中按 ObjectRedirector 类查询资产注册表，
+    一次性修复所有引用后删除，耗时取决于本次移动的范围而不是项目大小
+    """
     redirector_count = 0
     
+    if not folders:
+        print("✅ 没有资产被移动，无需清理重定向器")
+        return 0
+    
     try:
-        # 获取所有重定向器
-        redirector_paths = []
-        all_assets = unreal.EditorAssetLibrary.list_assets("/Game", recursive=True)
+        # 查询涉及文件夹中的重定向器
+        asset_registry = unreal.AssetRegistryHelpers.get_asset_registry()
+        redirector_filter = unreal.ARFilter(
+            package_paths=sorted(folders),
+            class_paths=[make_class_path(REDIRECTOR_CLASS_PATH)],
+            recursive_paths=False
+        )
+        redirectors = []
+        for asset_data in asset_registry.get_assets(redirector_filter):
+            redirector = asset_data.get_asset()
+            if redirector:
+                redirectors.append(redirector)
         
-        for asset_path in all_assets:
-            if asset_path.endswith("_Redirector"):
-                redirector_paths.append(asset_path)
-        
-        if redirector_paths:
-            print("🗑️  批量删除 " + str(len(redirector_paths)) + " 个重定向器")
+        if redirectors:
+            print("🗑️  批量修复 " + str(len(redirectors)) + " 个重定向器的引用（" + str(len(folders)) + " 个文件夹）")
+            
+            # 一次调用修复全部引用，修复完成的重定向器会被删除
+            asset_tools = unreal.AssetToolsHelpers.get_asset_tools()
+            asset_tools.fixup_referencers(redirectors, checkout_dialog_prompt=False)
             
-            # 批量删除重定向器
-            for redirector_path in redirector_paths:
+            for redirector in redirectors:
+                redirector_path = redirector.get_path_name()
                 try:
-                    unreal.EditorAssetLibrary.delete_asset(redirector_path)
-                    redirector_count += 1
+                    if not unreal.EditorAssetLibrary.does_asset_exist(redirector_path) or unreal.EditorAssetLibrary.delete_asset(redirector_path):
+                        redirector_count += 1
                 except Exception as e:
                     print("删除重定向器失败: " + redirector_path + " 错误: " + str(e))
         
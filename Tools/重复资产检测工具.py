@@ -0,0 +1,419 @@
+"""
+重复资产检测工具
+
+在编辑器外运行，遍历项目 Content 目录，找出字节完全相同或数据部分相同（只有包头不同）的资产，
+输出重复资产分组报告。Scripts/资产批量整理工具.py 可读取报告，把每组合并到保留的资产并修复引用。
+不依赖 unreal 模块，可以在构建机上运行。
+
+检测流程:
+    1. 遍历 Content 目录，.uasset/.umap 与同名的 .uexp/.ubulk/.uptnl 视为一个资产
+    2. payload 模式下解析每个资产的包文件头，数据部分之外再比较名称表和导入表（导出数据只通过索引引用名称和其他对象，
+       两者不同的资产即使数据字节相同也不是重复资产），名称表中资产自身的包名和资产名视为相同；
+       包头无法解析的资产按完整文件比较。bytes 模式比较完整文件
+    3. 按待比较部分的大小和名称表、导入表分组，只有这些都相同的资产才需要读取内容
+    4. 进程池中通过内存映射先计算首尾部分的哈希，首尾相同的再计算完整哈希
+
+用法:
+    python Tools/重复资产检测工具.py D:/Projects/MyGame
+    python Tools/重复资产检测工具.py D:/Projects/MyGame/Content --mode bytes --workers 16
+    python Tools/重复资产检测工具.py D:/Projects/MyGame --output duplicates.json --show 50
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+PACKAGE_EXTENSIONS = (".uasset", ".umap")
+COMPANION_EXTENSIONS = (".uexp", ".ubulk", ".uptnl")
+
+PACKAGE_FILE_TAG = 0x9E2A83C1
+PKG_FILTER_EDITOR_ONLY = 0x80000000
+# 包文件头中字段随引擎版本变化的版本号（FileVersionUE4 / FileVersionUE5）
+VER_UE4_SERIALIZE_TEXT_IN_PACKAGES = 459
+VER_UE4_NAME_HASHES_SERIALIZED = 504
+VER_UE4_ADDED_PACKAGE_SUMMARY_LOCALIZATION_ID = 516
+VER_UE4_NON_OUTER_PACKAGE_IMPORT = 518
+UE5_OPTIONAL_RESOURCES = 1003
+UE5_ADD_SOFTOBJECTPATH_LIST = 1008
+# FileVersionUE5 从该版本起，包头大小前多了 20 字节的 SavedHash
+UE5_PACKAGE_SAVED_HASH = 1016
+# 读取包文件头时先读取的字节数（文件摘要在其中），名称表和导入表按包头大小再完整读取
+SUMMARY_READ_SIZE = 64 * 1024
+# 名称表和导入表中代表资产自身包名、资产名的占位符
+SELF_NAME = "<self>"
+
+# 首尾哈希各读取的字节数，首尾都相同时才计算完整哈希
+PARTIAL_HASH_SIZE = 64 * 1024
+HASH_CHUNK_SIZE = 8 * 1024 * 1024
+
+def find_content_dir(path):
+    """传入项目目录时使用其中的 Content 目录"""
+    content_dir = os.path.join(path, "Content")
+    return content_dir if os.path.isdir(content_dir) else path
+
+def collect_assets(content_dir, min_size):
+    """
+    遍历 Content 目录，返回资产列表 [(包路径, [文件路径]), ...]，主文件在前，伴随文件按扩展名顺序在后
+    """
+    assets = []
+    pending_dirs = [content_dir]
+    while pending_dirs:
+        current_dir = pending_dirs.pop()
+        try:
+            entries = list(os.scandir(current_dir))
+        except OSError as e:
+            print(f"⚠️  无法读取目录: {current_dir} 错误: {e}")
+            continue
+
+        file_names = set()
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                pending_dirs.append(entry.path)
+            else:
+                file_names.add(entry.name)
+
+        for file_name in file_names:
+            base_name, extension = os.path.splitext(file_name)
+            if extension.lower() not in PACKAGE_EXTENSIONS:
+                continue
+
+            files = [os.path.join(current_dir, file_name)]
+            files.extend(os.path.join(current_dir, base_name + companion)
+                         for companion in COMPANION_EXTENSIONS if base_name + companion in file_names)
+            if sum(os.path.getsize(file_path) for file_path in files) < min_size:
+                continue
+
+            relative_path = os.path.relpath(os.path.join(current_dir, base_name), content_dir)
+            assets.append(("/Game/" + relative_path.replace(os.sep, "/"), files))
+    return assets
+
+class HeaderReader:
+    """按小端序顺序读取包文件头的字段，越界时抛出 struct.error"""
+
+    def __init__(self, data, offset=0):
+        self.data = data
+        self.offset = offset
+
+    def int32(self):
+        value = struct.unpack_from("<i", self.data, self.offset)[0]
+        self.offset += 4
+        return value
+
+    def uint32(self):
+        value = struct.unpack_from("<I", self.data, self.offset)[0]
+        self.offset += 4
+        return value
+
+    def skip(self, size):
+        self.offset += size
+
+    def fstring(self):
+        """FString：正长度为以 0 结尾的单字节字符串，负长度为 UTF-16 字符串"""
+        length = self.int32()
+        if length == 0:
+            return ""
+        if length > 0:
+            raw = self.data[self.offset:self.offset + length]
+            self.offset += length
+            return raw[:-1].decode("latin-1")
+        raw = self.data[self.offset:self.offset - length * 2]
+        self.offset -= length * 2
+        return raw[:-2].decode("utf-16-le")
+
+def parse_package_header(file_path):
+    """
+    解析包文件头（FPackageFileSummary），返回 {"total_header_size", "names", "imports"}，
+    imports 为 [(类所在包, 类名, 外部对象索引, 对象名)]，其中名称为 (名称表索引, 编号)
+    只支持 UE4 后期版本和 UE5 使用的优化自定义版本格式（LegacyFileVersion <= -6），
+    无法识别或字段超出范围时返回 None（按完整文件比较）
+    """
+    try:
+        with open(file_path, "rb") as f:
+            data = f.read(SUMMARY_READ_SIZE)
+            reader = HeaderReader(data)
+            if reader.uint32() != PACKAGE_FILE_TAG:
+                return None
+            legacy_file_version = reader.int32()
+            if legacy_file_version > -6:
+                return None
+            reader.int32()  # LegacyUE3Version
+            file_version_ue4 = reader.int32()
+            file_version_ue5 = reader.int32() if legacy_file_version <= -8 else 0
+            reader.int32()  # FileVersionLicenseeUE4
+            if file_version_ue4 == 0:
+                return None  # 无版本信息的包（烘焙内容）
+
+            custom_version_count = reader.int32()
+            if custom_version_count < 0:
+                return None
+            reader.skip(custom_version_count * 20)  # FGuid + int32
+            if file_version_ue5 >= UE5_PACKAGE_SAVED_HASH:
+                reader.skip(20)  # FIoHash SavedHash
+            total_header_size = reader.int32()
+            if not 0 < total_header_size <= os.path.getsize(file_path):
+                return None
+
+            reader.fstring()  # PackageName
+            package_flags = reader.uint32()
+            editor_data = not package_flags & PKG_FILTER_EDITOR_ONLY
+            name_count = reader.int32()
+            name_offset = reader.int32()
+            if file_version_ue5 >= UE5_ADD_SOFTOBJECTPATH_LIST:
+                reader.skip(8)  # SoftObjectPathsCount, SoftObjectPathsOffset
+            if editor_data and file_version_ue4 >= VER_UE4_ADDED_PACKAGE_SUMMARY_LOCALIZATION_ID:
+                reader.fstring()  # LocalizationId
+            if file_version_ue4 >= VER_UE4_SERIALIZE_TEXT_IN_PACKAGES:
+                reader.skip(8)  # GatherableTextDataCount, GatherableTextDataOffset
+            reader.skip(8)  # ExportCount, ExportOffset
+            import_count = reader.int32()
+            import_offset = reader.int32()
+
+            if total_header_size > len(data):
+                f.seek(0)
+                data = f.read(total_header_size)
+
+        if (name_count < 0 or import_count < 0
+                or not 0 < name_offset <= total_header_size or not 0 <= import_offset <= total_header_size):
+            return None
+
+        reader = HeaderReader(data, name_offset)
+        names = []
+        for _ in range(name_count):
+            names.append(reader.fstring())
+            if file_version_ue4 >= VER_UE4_NAME_HASHES_SERIALIZED:
+                reader.skip(4)  # 两个 uint16 哈希
+
+        reader = HeaderReader(data, import_offset)
+        imports = []
+        for _ in range(import_count):
+            class_package = (reader.int32(), reader.int32())
+            class_name = (reader.int32(), reader.int32())
+            outer_index = reader.int32()
+            object_name = (reader.int32(), reader.int32())
+            if editor_data and file_version_ue4 >= VER_UE4_NON_OUTER_PACKAGE_IMPORT:
+                reader.skip(8)  # PackageName
+            if file_version_ue5 >= UE5_OPTIONAL_RESOURCES:
+                reader.skip(4)  # bImportOptional
+            imports.append((class_package, class_name, outer_index, object_name))
+        if reader.offset > total_header_size:
+            return None
+
+        return {"total_header_size": total_header_size, "names": names, "imports": imports}
+    except (OSError, struct.error, UnicodeDecodeError):
+        return None
+
+def get_header_key(header, package_path):
+    """
+    名称表和按外部对象链解析出完整路径的导入表的哈希，资产自身的包名和资产名替换为占位符，
+    数据部分通过索引引用的名称和对象都相同的资产才会得到相同的键，索引越界时返回 None
+    """
+    own_names = {package_path, package_path.rsplit("/", 1)[-1]}
+    names = [SELF_NAME if name in own_names else name for name in header["names"]]
+    imports = header["imports"]
+
+    def resolve_name(name):
+        index, number = name
+        return names[index] + ("_" + str(number - 1) if number else "")
+
+    def resolve_import(import_index, depth=0):
+        class_package, class_name, outer_index, object_name = imports[import_index]
+        path = resolve_name(object_name)
+        if outer_index < 0 and depth < len(imports):
+            path = resolve_import(-outer_index - 1, depth + 1) + "." + path
+        elif outer_index > 0:
+            path = "<export " + str(outer_index) + ">." + path
+        return path
+
+    try:
+        import_paths = [
+            resolve_name(class_package) + "." + resolve_name(class_name) + " " + resolve_import(index)
+            for index, (class_package, class_name, _, _) in enumerate(imports)
+        ]
+    except IndexError:
+        return None
+
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update("\n".join(names).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update("\n".join(import_paths).encode("utf-8"))
+    return digest.hexdigest()
+
+def describe_asset(task):
+    """
+    进程池任务：返回资产的比较片段 [(文件路径, 起始偏移, 长度)]、比较部分的总大小和包头键
+    payload 模式下跳过主文件的包头，改为比较名称表和导入表的键；包头无法解析时比较完整文件
+    """
+    mode, package_path, files = task
+    start = 0
+    header_key = ""
+    if mode == "payload":
+        header = parse_package_header(files[0])
+        key = get_header_key(header, package_path) if header else None
+        if key:
+            start = header["total_header_size"]
+            header_key = key
+
+    segments = []
+    for index, file_path in enumerate(files):
+        file_start = start if index == 0 else 0
+        segments.append((file_path, file_start, os.path.getsize(file_path) - file_start))
+    return segments, sum(length for _, _, length in segments), header_key
+
+def hash_segments(task):
+    """
+    进程池任务：通过内存映射计算比较片段的哈希
+    partial 为 True 时只读取每个片段的首尾 PARTIAL_HASH_SIZE 字节
+    """
+    segments, partial = task
+    digest = hashlib.blake2b(digest_size=20)
+    for file_path, start, length in segments:
+        digest.update(struct.pack("<q", length))
+        if length <= 0:
+            continue
+        with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                if partial and length > PARTIAL_HASH_SIZE * 2:
+                    digest.update(view[start:start + PARTIAL_HASH_SIZE])
+                    digest.update(view[start + length - PARTIAL_HASH_SIZE:start + length])
+                else:
+                    for chunk_start in range(start, start + length, HASH_CHUNK_SIZE):
+                        digest.update(view[chunk_start:min(chunk_start + HASH_CHUNK_SIZE, start + length)])
+            finally:
+                view.release()
+    return digest.hexdigest()
+
+def group_by_key(items, key_function):
+    """按键分组，只保留两个以上成员的组"""
+    groups = {}
+    for item in items:
+        groups.setdefault(key_function(item), []).append(item)
+    return [group for group in groups.values() if len(group) > 1]
+
+def hash_groups(executor, groups, partial, workers):
+    """对每组成员并行计算哈希，按哈希拆分后只保留两个以上成员的组"""
+    members = [member for group in groups for member in group]
+    tasks = [(member["segments"], partial) for member in members]
+    chunk_size = max(1, len(tasks) // (workers * 8))
+    for member, digest in zip(members, executor.map(hash_segments, tasks, chunksize=chunk_size)):
+        member["hash"] = digest
+    return [subgroup for group in groups for subgroup in group_by_key(group, lambda member: member["hash"])]
+
+def choose_keeper(package_paths):
+    """保留层级最浅、路径排序最靠前的资产"""
+    return min(package_paths, key=lambda package_path: (package_path.count("/"), package_path.lower()))
+
+def find_duplicates(content_dir, mode, workers, min_size):
+    """检测重复资产，返回报告"""
+    start_time = time.time()
+    assets = collect_assets(content_dir, min_size)
+    print(f"📁 找到 {len(assets)} 个资产，用时 {time.time() - start_time:.2f}秒")
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # 读取包头得到比较片段，按类型、比较部分的大小和名称表、导入表分组
+        stage_start = time.time()
+        chunk_size = max(1, len(assets) // (workers * 8))
+        tasks = [(mode, package_path, files) for package_path, files in assets]
+        members = []
+        descriptions = executor.map(describe_asset, tasks, chunksize=chunk_size)
+        for (package_path, files), (segments, compare_size, header_key) in zip(assets, descriptions):
+            members.append({
+                "package": package_path,
+                "extension": os.path.splitext(files[0])[1].lower(),
+                "segments": segments,
+                "compare_size": compare_size,
+                "header_key": header_key,
+                "disk_size": sum(os.path.getsize(file_path) for file_path in files),
+            })
+        size_groups = group_by_key([member for member in members if member["compare_size"] > 0],
+                                   lambda member: (member["extension"], member["compare_size"], member["header_key"]))
+        candidate_count = sum(len(group) for group in size_groups)
+        print(f"📏 按大小分组: {len(size_groups)} 组 {candidate_count} 个候选，用时 {time.time() - stage_start:.2f}秒")
+
+        stage_start = time.time()
+        partial_groups = hash_groups(executor, size_groups, True, workers)
+        print(f"🔍 首尾哈希: {len(partial_groups)} 组 {sum(len(group) for group in partial_groups)} 个候选，"
+              f"用时 {time.time() - stage_start:.2f}秒")
+
+        stage_start = time.time()
+        duplicate_groups = hash_groups(executor, partial_groups, False, workers)
+        hashed_bytes = sum(member["compare_size"] for group in partial_groups for member in group)
+        print(f"🔐 完整哈希: {len(duplicate_groups)} 组，读取 {hashed_bytes / 1024.0 / 1024.0:.1f} MB，"
+              f"用时 {time.time() - stage_start:.2f}秒")
+
+    groups = []
+    for group in duplicate_groups:
+        package_paths = sorted(member["package"] for member in group)
+        keeper = choose_keeper(package_paths)
+        groups.append({
+            "hash": group[0]["hash"],
+            "size": group[0]["disk_size"],
+            "keeper": keeper,
+            "duplicates": [package_path for package_path in package_paths if package_path != keeper],
+        })
+    groups.sort(key=lambda group: -group["size"] * len(group["duplicates"]))
+
+    return {
+        "content_dir": os.path.abspath(content_dir),
+        "mode": mode,
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "scanned_assets": len(assets),
+        "wasted_bytes": sum(group["size"] * len(group["duplicates"]) for group in groups),
+        "elapsed": round(time.time() - start_time, 2),
+        "groups": groups,
+    }
+
+def print_report(report, show_count):
+    """输出重复分组汇总"""
+    groups = report["groups"]
+    duplicate_count = sum(len(group["duplicates"]) for group in groups)
+    print(f"\n📊 重复资产: {len(groups)} 组，可合并 {duplicate_count} 个，"
+          f"占用 {report['wasted_bytes'] / 1024.0 / 1024.0:.2f} MB，总用时 {report['elapsed']}秒")
+    for group in groups[:show_count]:
+        print(f"  ✅ {group['keeper']}  ({group['size'] / 1024.0:.1f} KB)")
+        for package_path in group["duplicates"]:
+            print(f"     = {package_path}")
+    if len(groups) > show_count:
+        print(f"  ... 还有 {len(groups) - show_count} 组")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="在编辑器外检测 Content 目录中的重复资产")
+    parser.add_argument("path", help="项目目录或 Content 目录")
+    parser.add_argument("--mode", choices=["payload", "bytes"], default="payload",
+                        help="payload: 比较数据部分和名称表、导入表，忽略包名等包头差异（默认）；bytes: 比较完整文件")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="哈希进程数")
+    parser.add_argument("--min-size", type=int, default=0, help="忽略小于该字节数的资产")
+    parser.add_argument("--output", default="", help="报告JSON路径，默认写入项目 Saved/AssetOrganizer/duplicate_assets.json")
+    parser.add_argument("--show", type=int, default=20, help="输出的最多分组数")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    content_dir = find_content_dir(args.path)
+    if not os.path.isdir(content_dir):
+        print(f"❌ 目录不存在: {content_dir}")
+        return 1
+
+    print("=== 🔎 重复资产检测工具 ===")
+    print(f"Content 目录: {content_dir}，模式: {args.mode}，进程数: {args.workers}")
+    report = find_duplicates(content_dir, args.mode, args.workers, args.min_size)
+    print_report(report, args.show)
+
+    output_path = args.output or os.path.join(os.path.dirname(os.path.abspath(content_dir)),
+                                              "Saved", "AssetOrganizer", "duplicate_assets.json")
+    output_folder = os.path.dirname(output_path)
+    if output_folder:
+        os.makedirs(output_folder, exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=1)
+    print(f"💾 报告已写入: {output_path}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())